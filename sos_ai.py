@@ -1,82 +1,468 @@
+import asyncio
+import http.client
+import math
+import os
+import queue
 import random
 import json
-import urllib.request
-from sos_logic import BaseGame
+import logging
+import socket
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import sos_stats
+from sos_logic import (BaseGame, SYMMETRY_COUNT, canonicalize, inverse_transform_cell,
+                       sos_line_index, transform_cell)
+from sos_shm import SearchPool
+from sos_tablebase import Tablebase, table_path
+
+# Ollama diagnostics go through logging (stderr by default), never stdout,
+# which tools like sos_bench keep for machine-readable output
+log = logging.getLogger(__name__)
+
+
+def _empty_cells(board, board_size):
+    """Empty cells of `board`, using a sparse board's maintained list when available."""
+    if hasattr(board, "empty_cells"):
+        return board.empty_cells()
+    return [(r, c)
+            for r in range(board_size)
+            for c in range(board_size)
+            if board[r][c] == ""]
+
+
+class CancelToken:
+    """Cancels one choose_move call from another thread, even before it starts.
+
+    Strategies that take a `cancel` token poll `cancelled` and register
+    callbacks with `on_cancel` to interrupt blocking work.
+    """
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """Runs `callback` on cancel, or now if already cancelled; returns a
+        function that unregisters it."""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
 
 
 class PlayerStrategy:
-    """Abstract base for move‐selection strategies."""
-    def choose_move(self, board, board_size, letter_choices, player_color):
-        """Return (row, col, letter)."""
+    """Abstract base for move‐selection strategies.
+
+    Strategies with `cancellable` set also accept a `cancel` CancelToken in
+    choose_move and return a legal move soon after it is cancelled.
+    """
+    cancellable = False
+
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General"):
+        """Return (row, col, letter) for `player_color` to play in `game_mode`."""
         raise NotImplementedError
 
+
+def choose_move_cancellable(strategy, cancel, board, board_size, letter_choices, player_color,
+                            game_mode="General"):
+    """Calls strategy.choose_move, passing `cancel` on if the strategy takes one."""
+    if cancel is not None and getattr(strategy, "cancellable", False):
+        return strategy.choose_move(board, board_size, letter_choices, player_color, game_mode,
+                                    cancel=cancel)
+    return strategy.choose_move(board, board_size, letter_choices, player_color, game_mode)
+
+
 class RandomStrategy(PlayerStrategy):
     """Picks a random empty cell and random letter."""
-    def choose_move(self, board, board_size, letter_choices, player_color):
-        empties = [(r, c)
-                   for r in range(board_size)
-                   for c in range(board_size)
-                   if board[r][c] == ""]
-        row, col = random.choice(empties)
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General"):
+        row, col = random.choice(_empty_cells(board, board_size))
         letter = random.choice(['S', 'O'])
         return row, col, letter
     
 class SmartStrategy(PlayerStrategy):
     """First try a quick SOS heuristic, then call the tuned LLM."""
+    cancellable = True
+
     def __init__(self, model="llama3.2-vision", temp=0.3):
         self.llm = OllamaStrategy(model=model, temperature=temp)
 
-    def choose_move(self, board, board_size, letter_choices, player_color):
-        from sos_logic import BaseGame  # adjust import if needed
-
-        logic = BaseGame(board_size, game_mode="General")
-        logic.board = [row.copy() for row in board]
-        empties = [(r, c) for r in range(board_size)
-                          for c in range(board_size)
-                          if board[r][c] == ""]
-
-        # 1) Immediate self-SOS
-        for r, c in empties:
-            for letter in ['S', 'O']:
-                logic.board[r][c] = letter
-                if logic.check_for_sos(r, c):
-                    return r, c, letter
-                logic.board[r][c] = ""
-
-        # 2) Block opponent SOS
-        opponent = "Red" if player_color == "Blue" else "Blue"
-        for r, c in empties:
-            for letter in ['S', 'O']:
-                logic.board[r][c] = letter
-                logic.current_player = opponent
-                if logic.check_for_sos(r, c):
-                    return r, c, letter
-                logic.board[r][c] = ""
-        logic.current_player = player_color
-
-        # 3) Delegate to LLM
-        return self.llm.choose_move(board, board_size, letter_choices, player_color)
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General",
+                    cancel=None):
+        # Boards from a game's strategy_board() carry its live threat map
+        game = getattr(board, "game", None)
+        if game is None or game.threats is None:
+            game = BaseGame.from_board(board, "General", player_color, track_threats=True)
+
+        # 1) Immediate self-SOS. Any placement that scores for us would also
+        # score for the opponent, so the same move is the block in step 2.
+        move = game.best_threat()
+        if move is not None:
+            return move
+
+        # 2) Delegate to LLM
+        return self.llm.choose_move(board, board_size, letter_choices, player_color, game_mode,
+                                    cancel=cancel)
+
+class _ConnectionPool:
+    """Thread-safe pool of keep-alive HTTP connections to one host."""
+    def __init__(self, host, port, timeout, size=4):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def post(self, path, body, headers, cancel=None):
+        """POSTs `body` and returns (status, response bytes), reusing an idle connection.
+
+        Cancelling `cancel` (a CancelToken) cuts the request off; it then
+        raises ConnectionAbortedError.
+        """
+        for attempt in range(2):
+            try:
+                conn = self._idle.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                reused = False
+            unregister = cancel.on_cancel(lambda: _shutdown(conn)) if cancel else None
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                # A cancel while connecting found no socket to shut down
+                if cancel is not None and cancel.cancelled:
+                    raise ConnectionAbortedError("request cancelled")
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                # A reused connection may have been closed by the server; retry once fresh
+                if reused and attempt == 0 and not (cancel and cancel.cancelled):
+                    sos_stats.count("ollama.http_retries")
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            finally:
+                if unregister is not None:
+                    unregister()
+            if resp.will_close:
+                conn.close()
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            return resp.status, raw
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _shutdown(conn):
+    """Wakes a thread blocked on `conn`'s socket; its read then fails."""
+    sock = conn.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _AsyncConnectionPool:
+    """Keep-alive HTTP/1.1 connections for asyncio, with a concurrency limit.
+
+    Connections and the limiting semaphore belong to one event loop; they
+    are recreated when used from a new loop (e.g. a later asyncio.run).
+    """
+    def __init__(self, host, port, concurrency):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self._loop = None
+        self._semaphore = None
+        self._idle = []
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self.close()
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    def limit(self):
+        """Async context manager holding one of the `concurrency` request slots."""
+        self._bind()
+        return self._semaphore
+
+    async def post(self, path, body, content_type):
+        """POSTs `body` and returns (status, response bytes)."""
+        self._bind()
+        request = (f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                   f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                   "Connection: keep-alive\r\n\r\n").encode("latin-1") + body
+        for attempt in range(2):
+            if self._idle:
+                reader, writer = self._idle.pop()
+                reused = True
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                reused = False
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive, raw = await self._read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # A reused connection may have been closed by the server; retry once fresh
+                if reused and attempt == 0:
+                    sos_stats.count("ollama.http_retries")
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return status, raw
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        version, status = status_line.split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and version == b"HTTP/1.1"
+        if "content-length" in headers:
+            raw = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            raw = b"".join(chunks)
+        else:
+            raw = await reader.read()
+            keep_alive = False
+        return int(status), keep_alive, raw
+
+    def close(self):
+        # Transports of a finished asyncio.run loop were already torn down with it
+        if self._loop is not None and not self._loop.is_closed():
+            for _, writer in self._idle:
+                writer.close()
+        self._idle = []
+
+
+class _LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
 
 class OllamaStrategy(PlayerStrategy):
-    """Calls your local Ollama HTTP API (OpenAI-compatible) for a move."""
-    def __init__(self, model: str = "llama3.2-vision", temperature: float = 0.3, timeout: int = 30):
+    """Calls your local Ollama HTTP API (OpenAI-compatible) for a move.
+
+    Requests go over a pool of keep-alive connections, and parsed moves are
+    cached per (canonical board, player) so repeated or symmetric positions
+    skip the round-trip. Replies are checked for legality; an illegal one is
+    answered with a repair prompt listing the legal cells, up to
+    `max_retries` times, before `fallback` (by default a local alpha-beta or
+    threat search) plays the move. `outcomes` counts which path each move took.
+    """
+    SYSTEM_MSG = {
+        "role": "system",
+        "content": (
+            "You are an expert SOS player. "
+            "Try to make SOS when possible, block opponent SOS, "
+            "and set up future SOS opportunities."
+        )
+    }
+
+    # Largest board the default fallback searches with alpha-beta; beyond it
+    # the fallback completes an open SOS if there is one, else plays randomly.
+    LOCAL_SEARCH_MAX_SIZE = 10
+    # Legal cells are listed in repair prompts only up to this many.
+    MAX_LISTED_MOVES = 64
+    OUTCOMES = ("cached", "valid", "repaired", "fallback")
+    cancellable = True
+
+    def __init__(self, model: str = "llama3.2-vision", temperature: float = 0.3, timeout: int = 30,
+                 endpoint: str = "http://127.0.0.1:11434/v1/chat/completions",
+                 cache_size: int = 4096, pool_size: int = 4, concurrency: int = 8,
+                 max_retries: int = 2, fallback=None, fallback_workers: int = None):
         self.model = model
         self.temperature = temperature
         self.timeout = timeout
-        self.endpoint = "http://127.0.0.1:11434/v1/chat/completions"
+        self.endpoint = endpoint
+        self.max_retries = max_retries
+        self.fallback = fallback
+        url = urllib.parse.urlsplit(endpoint)
+        self._path = url.path or "/"
+        self._pool = _ConnectionPool(url.hostname, url.port or 80, timeout, pool_size)
+        self._async_pool = _AsyncConnectionPool(url.hostname, url.port or 80, concurrency)
+        self.cache = _LRUCache(cache_size)
+        # How each move was produced: from the cache, the model's first reply,
+        # a reply after repair prompts, or the local fallback
+        self.outcomes = dict.fromkeys(self.OUTCOMES, 0)
+        self.invalid_replies = 0
+        self._local = threading.local()
+        self._fallback_lock = threading.Lock()
+        # Async fallbacks are CPU-bound and share the GIL, so they are
+        # time-sliced rather than parallel; more threads than cores would
+        # only leave each 0.2 s search with a thinner slice
+        self.fallback_workers = fallback_workers or os.cpu_count() or 1
+        self._fallback_executor = None
+        self._executor_lock = threading.Lock()
 
-    def choose_move(self, board, board_size, letter_choices, player_color):
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General",
+                    cancel=None):
+        """Asks the model for a move.
+
+        Once `cancel` is cancelled no further requests or repair prompts are
+        sent, the request in flight is cut off and a random legal move is
+        returned instead of running the fallback search.
+        """
+        cancelled = cancel is not None and cancel.cancelled
+        move, key, transform = self._cached_move(board, board_size, player_color)
+        if move is not None:
+            return move
+        if not cancelled:
+            dialogue = self._dialogue(board, board_size, player_color)
+            try:
+                body = next(dialogue)
+                while not (cancel is not None and cancel.cancelled):
+                    sos_stats.count("ollama.requests")
+                    status, raw = self._pool.post(self._path, body,
+                                                  {"Content-Type": "application/json"}, cancel)
+                    body = dialogue.send(self._reply_text(status, raw))
+            except StopIteration as done:
+                move = done.value
+            except Exception as e:
+                if not (cancel is not None and cancel.cancelled):
+                    self._log_error(e)
+            cancelled = cancel is not None and cancel.cancelled
+        if move is None and cancelled:
+            # Nobody is waiting for this move; skip the fallback search
+            return RandomStrategy().choose_move(board, board_size, letter_choices, player_color,
+                                                game_mode)
+        if move is None:
+            return self._fallback(board, board_size, letter_choices, player_color, game_mode,
+                                  cancel)
+        self._store_move(key, transform, move, board_size)
+        return move
+
+    async def choose_move_async(self, board, board_size, letter_choices, player_color,
+                                game_mode="General"):
+        """Asyncio version of choose_move for running many games concurrently.
+
+        At most `concurrency` requests are in flight per event loop; each one
+        is bounded by `timeout` once it starts, and failures fall back to the
+        local strategy as in choose_move, on at most `fallback_workers`
+        worker threads.
+        """
+        move, key, transform = self._cached_move(board, board_size, player_color)
+        if move is not None:
+            return move
+        dialogue = self._dialogue(board, board_size, player_color)
+        try:
+            body = next(dialogue)
+            while True:
+                async with self._async_pool.limit():
+                    sos_stats.count("ollama.requests")
+                    status, raw = await asyncio.wait_for(
+                        self._async_pool.post(self._path, body, "application/json"), self.timeout)
+                body = dialogue.send(self._reply_text(status, raw))
+        except StopIteration as done:
+            move = done.value
+        except Exception as e:
+            self._log_error(e)
+            move = None
+        if move is None:
+            # The fallback search is CPU-bound; keep it off the event loop so
+            # other games' requests carry on meanwhile
+            with self._executor_lock:
+                if self._fallback_executor is None:
+                    self._fallback_executor = ThreadPoolExecutor(
+                        self.fallback_workers, thread_name_prefix="ollama-fallback")
+            return await asyncio.get_running_loop().run_in_executor(
+                self._fallback_executor, self._fallback, board, board_size, letter_choices,
+                player_color, game_mode)
+        self._store_move(key, transform, move, board_size)
+        return move
+
+    @staticmethod
+    def _log_error(e):
+        sos_stats.count("ollama.errors")
+        log.warning("Error talking to Ollama server: %s", getattr(e, 'reason', e) or type(e).__name__)
+
+    def _dialogue(self, board, board_size, player_color):
+        """Generator yielding request bodies and receiving reply texts.
+
+        Returns the first legal move, or None once `max_retries` repair
+        prompts have also produced illegal replies.
+        """
         # Build text-board
         rows = ["".join(cell or "." for cell in row) for row in board]
         board_str = "\n".join(rows)
-        system_msg = {
-            "role": "system",
-            "content": (
-                "You are an expert SOS player. "
-                "Try to make SOS when possible, block opponent SOS, "
-                "and set up future SOS opportunities."
-            )
-        }
         user_msg = {
             "role": "user",
             "content": (
@@ -86,31 +472,524 @@ class OllamaStrategy(PlayerStrategy):
                 "Respond ONLY as row,col,letter."
             )
         }
+        messages = [self.SYSTEM_MSG, user_msg]
+        for attempt in range(self.max_retries + 1):
+            text = yield self._request_body(messages)
+            move, problem = self._check_reply(text, board, board_size)
+            if problem is None:
+                outcome = "valid" if attempt == 0 else "repaired"
+                self.outcomes[outcome] += 1
+                sos_stats.count(f"ollama.{outcome}")
+                return move
+            log.info("Ollama reply %r rejected: %s", text, problem)
+            self.invalid_replies += 1
+            sos_stats.count("ollama.invalid_replies")
+            messages = messages + [{"role": "assistant", "content": text},
+                                   self._repair_msg(problem, board, board_size)]
+        return None
+
+    def _request_body(self, messages):
         payload = {
             "model": self.model,
             "temperature": self.temperature,
-            "messages": [system_msg, user_msg]
+            "messages": messages
         }
+        return json.dumps(payload).encode("utf-8")
 
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            self.endpoint,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
+    def _reply_text(self, status, body):
+        if status != 200:
+            raise OSError(f"HTTP {status}")
+        raw = body.decode("utf-8")
+        log.debug("Ollama raw response: %s", raw)
+        parsed = json.loads(raw)
+        return parsed["choices"][0]["message"]["content"].strip()
+
+    @staticmethod
+    def _check_reply(text, board, board_size):
+        """Returns (move, None) for a legal reply, else (None, reason)."""
+        lines = text.splitlines()
         try:
-            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-                raw = resp.read().decode("utf-8")
-                print("[Ollama] Raw response:", raw)
-                parsed = json.loads(raw)
-                text = parsed["choices"][0]["message"]["content"].strip().splitlines()[-1]
-                r, c, letter = text.split(",")
-                print(f"[Ollama] Parsed move: {r},{c},{letter}")
-                return int(r), int(c), letter.strip().upper()
-        except Exception as e:
-            err_msg = getattr(e, "reason", e)
-            print(f"[Ollama] Error talking to server: {err_msg}")
-            print(f"[Ollama] Falling back to RandomStrategy.")
-            return RandomStrategy().choose_move(board, board_size, letter_choices, player_color)
-        
\ No newline at end of file
+            r, c, letter = lines[-1].split(",")
+            r, c, letter = int(r), int(c), letter.strip().upper()
+        except (IndexError, ValueError):
+            return None, "the reply is not in the form row,col,letter"
+        log.debug("Ollama parsed move: %d,%d,%s", r, c, letter)
+        if letter not in ("S", "O"):
+            return None, f"the letter must be S or O, not {letter!r}"
+        if not (0 <= r < board_size and 0 <= c < board_size):
+            return None, f"{r},{c} is outside the {board_size}x{board_size} board"
+        if board[r][c] != "":
+            return None, f"cell {r},{c} is already taken"
+        return (r, c, letter), None
+
+    def _repair_msg(self, problem, board, board_size):
+        empties = _empty_cells(board, board_size)
+        if len(empties) <= self.MAX_LISTED_MOVES:
+            legal = "Legal cells (row,col): " + "; ".join(f"{r},{c}" for r, c in empties) + "."
+        else:
+            legal = (f"Legal cells are the '.' cells; rows and columns run "
+                     f"from 0 to {board_size - 1}.")
+        return {
+            "role": "user",
+            "content": (
+                f"That move is illegal: {problem}.\n{legal}\n"
+                "Respond ONLY as row,col,letter with letter S or O."
+            )
+        }
+
+    def _fallback(self, board, board_size, letter_choices, player_color, game_mode, cancel=None):
+        log.info("Ollama falling back to local strategy")
+        self.outcomes["fallback"] += 1
+        sos_stats.count("ollama.fallbacks")
+        if self.fallback is not None:
+            with self._fallback_lock:
+                return choose_move_cancellable(self.fallback, cancel, board, board_size,
+                                               letter_choices, player_color, game_mode)
+        if board_size <= self.LOCAL_SEARCH_MAX_SIZE:
+            # Async fallbacks run on worker threads; each keeps its own search
+            search = getattr(self._local, "search", None)
+            if search is None:
+                search = self._local.search = AlphaBetaStrategy(time_limit=0.2)
+            return search.choose_move(board, board_size, letter_choices, player_color, game_mode,
+                                      cancel=cancel)
+        game = getattr(board, "game", None)
+        if game is None or game.threats is None:
+            game = BaseGame.from_board(board, game_mode, player_color, track_threats=True)
+        move = game.best_threat()
+        if move is not None:
+            return move
+        return RandomStrategy().choose_move(board, board_size, letter_choices, player_color, game_mode)
+
+    def _cached_move(self, board, board_size, player_color):
+        """Returns (move or None, cache key, transform) for a position."""
+        # Symmetric positions share a cache entry; moves are stored canonically
+        canonical, transform = canonicalize(board)
+        key = (canonical, player_color)
+        cached = self.cache.get(key)
+        sos_stats.count("ollama.cache_hits" if cached is not None else "ollama.cache_misses")
+        if cached is None:
+            return None, key, transform
+        self.outcomes["cached"] += 1
+        r, c, letter = cached
+        return inverse_transform_cell(r, c, board_size, transform) + (letter,), key, transform
+
+    def _store_move(self, key, transform, move, board_size):
+        r, c, letter = move
+        self.cache.put(key, transform_cell(r, c, board_size, transform) + (letter,))
+
+    def close(self):
+        """Closes pooled connections and the fallback threads."""
+        self._pool.close()
+        self._async_pool.close()
+        if self._fallback_executor is not None:
+            self._fallback_executor.shutdown()
+            self._fallback_executor = None
+
+
+def _move_gain(board, index, row, col, letter):
+    """Counts the SOS sequences placing `letter` at empty (row, col) would complete."""
+    board[row][col] = letter
+    gain = sum(1 for (r1, c1), (rm, cm), (r2, c2) in index[row][col][letter]
+               if board[r1][c1] == 'S' and board[rm][cm] == 'O' and board[r2][c2] == 'S')
+    board[row][col] = ""
+    return gain
+
+
+class _SearchTimeout(Exception):
+    """Raised inside a search once its time budget is spent."""
+
+
+class AlphaBetaStrategy(PlayerStrategy):
+    """Iterative-deepening alpha-beta search with a Zobrist transposition table.
+
+    Values are the future point difference for the side to move (General) or
+    win/draw/loss (Simple). Scoring moves and the previous best move are
+    searched first; the search stops after `time_limit` seconds and plays the
+    best move of the deepest completed iteration.
+
+    With an `evaluator` (see sos_eval), the children of each frontier node are
+    valued together in one batched call instead of counting as 0.
+    """
+    WIN = 1000
+    # Scales a Simple-mode evaluation in [-1, 1] to stay below proven wins
+    SIMPLE_EVAL_SCALE = 100
+    EXACT, LOWER, UPPER = 0, 1, 2
+    cancellable = True
+
+    def __init__(self, time_limit=0.5, max_depth=None, tt_size=1 << 20, seed=0, evaluator=None):
+        self.time_limit = time_limit
+        self.evaluator = evaluator
+        self.max_depth = max_depth
+        self.tt_size = tt_size
+        self._rng = random.Random(seed)
+        self._zobrist = {}
+        self._tt_context = None
+        self.tt = {}
+        self.nodes = 0
+        self.last_depth = 0
+        self._deadline = 0.0
+
+    def _expire(self):
+        # Called on cancel: the search stops at its next deadline check
+        self._deadline = 0.0
+
+    def _keys(self, board_size):
+        """Zobrist tables per board symmetry: keys[t][r][c][letter].
+
+        Table t hashes the board as seen through symmetry t, so the minimum
+        over the 8 running hashes identifies the position up to symmetry.
+        """
+        keys = self._zobrist.get(board_size)
+        if keys is None:
+            base = [[{'S': self._rng.getrandbits(64), 'O': self._rng.getrandbits(64)}
+                     for _ in range(board_size)] for _ in range(board_size)]
+            keys = []
+            for t in range(SYMMETRY_COUNT):
+                table = [[None] * board_size for _ in range(board_size)]
+                for r in range(board_size):
+                    for c in range(board_size):
+                        tr, tc = transform_cell(r, c, board_size, t)
+                        table[r][c] = base[tr][tc]
+                keys.append(table)
+            self._zobrist[board_size] = keys
+        return keys
+
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General",
+                    cancel=None):
+        """Searches until the time limit, or until `cancel` is cancelled."""
+        if self._tt_context != (board_size, game_mode) or len(self.tt) > self.tt_size:
+            self.tt.clear()
+            self._tt_context = (board_size, game_mode)
+        logic = BaseGame.from_board(board, game_mode, player_color)
+        keys = self._keys(board_size)
+        hashes = [0] * SYMMETRY_COUNT
+        for r in range(board_size):
+            for c in range(board_size):
+                if board[r][c] in ('S', 'O'):
+                    for t in range(SYMMETRY_COUNT):
+                        hashes[t] ^= keys[t][r][c][board[r][c]]
+
+        self.nodes = 0
+        self.last_depth = 0
+        self._deadline = time.perf_counter() + self.time_limit
+        # Registered after the deadline is set, so an earlier cancel still counts
+        unregister = cancel.on_cancel(self._expire) if cancel is not None else None
+        empties = board_size * board_size - logic.total_moves
+        limit = empties if self.max_depth is None else min(self.max_depth, empties)
+        best = None
+        try:
+            for depth in range(1, limit + 1):
+                # Checked here too: shallow searches may never reach a node check
+                if time.perf_counter() > self._deadline:
+                    break
+                try:
+                    _, move = self._negamax(logic, keys, tuple(hashes), depth,
+                                            -self.WIN * 2, self.WIN * 2)
+                except _SearchTimeout:
+                    break
+                best = move
+                self.last_depth = depth
+        finally:
+            if unregister is not None:
+                unregister()
+        if best is None:
+            best = self._ordered_moves(logic, None)[0][1:]
+        sos_stats.count("alphabeta.nodes", self.nodes)
+        r, c, letter = best
+        return r, c, letter
+
+    def _ordered_moves(self, logic, first):
+        """Returns (gain, row, col, letter) with `first`, then scoring moves, leading."""
+        board, n = logic.board, logic.board_size
+        index = sos_line_index(n)
+        moves = [(_move_gain(board, index, r, c, letter), r, c, letter)
+                 for r in range(n) for c in range(n) if board[r][c] == ""
+                 for letter in ('S', 'O')]
+        moves.sort(key=lambda m: (m[1:] != first, -m[0]))
+        return moves
+
+    def _negamax(self, logic, keys, hashes, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout
+        if logic.total_moves == logic.board_size ** 2:
+            return 0, None
+        if depth == 0:
+            return 0, None
+
+        # Entries are keyed by the canonical hash; moves are stored in that frame
+        n = logic.board_size
+        h = min(hashes)
+        t = hashes.index(h)
+        alpha_orig = alpha
+        entry = self.tt.get(h)
+        tt_move = None
+        if entry is not None:
+            e_depth, e_value, e_flag, e_move = entry
+            if e_move is not None:
+                tt_move = inverse_transform_cell(e_move[0], e_move[1], n, t) + (e_move[2],)
+            if e_depth >= depth:
+                if e_flag == self.EXACT:
+                    return e_value, tt_move
+                if e_flag == self.LOWER:
+                    alpha = max(alpha, e_value)
+                elif e_flag == self.UPPER:
+                    beta = min(beta, e_value)
+                if alpha >= beta:
+                    return e_value, tt_move
+
+        simple = logic.game_mode == "Simple"
+        best_value, best_move = -self.WIN * 2, None
+        moves = self._ordered_moves(logic, tt_move)
+        leaves = None
+        if depth == 1 and self.evaluator is not None:
+            leaves = self.evaluator.evaluate_children(logic, [m[1:] for m in moves])
+            if simple:
+                leaves = leaves * self.SIMPLE_EVAL_SCALE
+            leaves = leaves.tolist()
+            self.nodes += len(moves)
+            # Batches move the node count past the 1024-node checkpoints
+            if time.perf_counter() > self._deadline:
+                raise _SearchTimeout
+        for i, (gain, r, c, letter) in enumerate(moves):
+            if simple and gain:
+                # Any SOS ends a Simple game; prefer the quickest win
+                value = self.WIN + depth
+            elif leaves is not None:
+                value = gain - leaves[i]
+            else:
+                logic.make_move(r, c, letter)
+                logic.switch_player()
+                try:
+                    child_hashes = tuple(hashes[i] ^ keys[i][r][c][letter]
+                                         for i in range(SYMMETRY_COUNT))
+                    child, _ = self._negamax(logic, keys, child_hashes,
+                                             depth - 1, -beta + gain, -alpha + gain)
+                finally:
+                    logic.unmake_move()
+                value = gain - child
+            if value > best_value:
+                best_value, best_move = value, (r, c, letter)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = self.UPPER
+        elif best_value >= beta:
+            flag = self.LOWER
+        else:
+            flag = self.EXACT
+        stored = None
+        if best_move is not None:
+            stored = transform_cell(best_move[0], best_move[1], n, t) + (best_move[2],)
+        self.tt[h] = (depth, best_value, flag, stored)
+        return best_value, best_move
+
+
+class _MCTSNode:
+    """UCT tree node; `wins` are counted for the player who moved into it."""
+    __slots__ = ("move", "parent", "mover", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, mover, untried):
+        self.move = move
+        self.parent = parent
+        self.mover = mover
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+def _legal_moves(logic, rng):
+    n = logic.board_size
+    moves = [(r, c, letter) for r in range(n) for c in range(n)
+             if logic.board[r][c] == "" for letter in ('S', 'O')]
+    rng.shuffle(moves)
+    return moves
+
+
+def _mcts_search(logic, playouts, time_limit, exploration, seed):
+    """Runs one UCT search from the position in `logic` for its current player;
+    returns ({move: visits}, playouts run).
+
+    Module-level so it can run as a SearchPool task.
+    """
+    rng = random.Random(seed)
+    player_color = logic.current_player
+    opponent = "Red" if player_color == "Blue" else "Blue"
+    root = _MCTSNode(None, None, opponent, _legal_moves(logic, rng))
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    done = 0
+    while (playouts is None or done < playouts) and \
+            (deadline is None or time.perf_counter() < deadline):
+        node, depth = root, 0
+        # Pool workers reuse this game for later tasks, so always unwind
+        try:
+            # Selection
+            while not node.untried and node.children and not logic.check_game_over():
+                log_n = math.log(node.visits)
+                node = max(node.children, key=lambda ch: ch.wins / ch.visits
+                           + exploration * math.sqrt(log_n / ch.visits))
+                logic.make_move(*node.move)
+                logic.switch_player()
+                depth += 1
+            # Expansion
+            if node.untried and not logic.check_game_over():
+                move = node.untried.pop()
+                mover = logic.current_player
+                logic.make_move(*move)
+                logic.switch_player()
+                depth += 1
+                child = _MCTSNode(move, node, mover, _legal_moves(logic, rng))
+                node.children.append(child)
+                node = child
+            # Rollout
+            empties = [(r, c) for r in range(logic.board_size)
+                       for c in range(logic.board_size) if logic.board[r][c] == ""]
+            while empties and not logic.check_game_over():
+                i = rng.randrange(len(empties))
+                empties[i], empties[-1] = empties[-1], empties[i]
+                r, c = empties.pop()
+                logic.make_move(r, c, 'S' if rng.random() < 0.5 else 'O')
+                logic.switch_player()
+                depth += 1
+            diff = logic.blue_points - logic.red_points
+        finally:
+            for _ in range(depth):
+                logic.unmake_move()
+        # Backpropagation, scored on points earned since the root position
+        while node is not None:
+            node.visits += 1
+            lead = diff if node.mover == "Blue" else -diff
+            node.wins += 1.0 if lead > 0 else 0.5 if lead == 0 else 0.0
+            node = node.parent
+        done += 1
+    return {child.move: child.visits for child in root.children}, done
+
+
+class MCTSStrategy(PlayerStrategy):
+    """Monte Carlo Tree Search (UCT) with root-parallel random rollouts.
+
+    Each of `workers` processes grows its own tree from the current position
+    for its share of `playouts` (or until `time_limit` seconds pass); root
+    visit counts are summed and the most visited move is played. Workers are
+    a persistent SearchPool (see sos_shm), which may be shared between
+    strategies via `pool`; positions reach them through shared memory.
+    Throughput of the last search is kept in `last_playouts_per_second`.
+    """
+    def __init__(self, playouts=4000, time_limit=None, workers=None, exploration=1.4, seed=None,
+                 pool=None):
+        if playouts is None and time_limit is None:
+            raise ValueError("MCTSStrategy needs a playout or time budget")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.workers = workers or (pool.workers if pool else os.cpu_count()) or 1
+        self.exploration = exploration
+        self._rng = random.Random(seed)
+        self._pool = pool
+        self._own_pool = False
+        self.last_playouts = 0
+        self.last_playouts_per_second = 0.0
+
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General"):
+        share = None if self.playouts is None else max(1, self.playouts // self.workers)
+        logic = BaseGame.from_board(board, game_mode, player_color)
+        jobs = [(share, self.time_limit, self.exploration, self._rng.getrandbits(32))
+                for _ in range(self.workers)]
+        start = time.perf_counter()
+        if self.workers == 1:
+            results = [_mcts_search(logic, *jobs[0])]
+        else:
+            if self._pool is None:
+                self._pool = SearchPool(self.workers, board_size)
+                self._own_pool = True
+            results = self._pool.run(logic, _mcts_search, jobs)
+        elapsed = time.perf_counter() - start
+
+        visits = {}
+        for counts, _ in results:
+            for move, n in counts.items():
+                visits[move] = visits.get(move, 0) + n
+        self.last_playouts = sum(done for _, done in results)
+        self.last_playouts_per_second = self.last_playouts / elapsed if elapsed > 0 else 0.0
+        sos_stats.count("mcts.playouts", self.last_playouts)
+        if not visits:
+            return RandomStrategy().choose_move(board, board_size, letter_choices, player_color, game_mode)
+        return max(visits, key=visits.get)
+
+    def close(self):
+        """Shuts down the worker pool, if this strategy started one."""
+        if self._own_pool:
+            self._pool.close()
+            self._pool = None
+            self._own_pool = False
+
+
+class TablebaseStrategy(PlayerStrategy):
+    """Plays perfect moves from solved tablebases (see sos_tablebase).
+
+    Tables are opened lazily per board size and mode from `directory`; when
+    none exists or the position is missing, `fallback` chooses instead.
+    """
+    cancellable = True
+
+    def __init__(self, directory="tablebases", fallback=None):
+        self.directory = directory
+        self.fallback = fallback or AlphaBetaStrategy()
+        self._tables = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _table(self, board_size, game_mode):
+        key = (board_size, game_mode)
+        if key not in self._tables:
+            path = table_path(self.directory, board_size, game_mode)
+            self._tables[key] = Tablebase(path) if os.path.exists(path) else None
+        return self._tables[key]
+
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General",
+                    cancel=None):
+        table = self._table(board_size, game_mode)
+        entry = table.lookup(board) if table is not None else None
+        if entry is None:
+            self.misses += 1
+            sos_stats.count("tablebase.misses")
+            return choose_move_cancellable(self.fallback, cancel, board, board_size,
+                                           letter_choices, player_color, game_mode)
+        self.hits += 1
+        sos_stats.count("tablebase.hits")
+        return entry[1]
+
+
+class BookStrategy(PlayerStrategy):
+    """Plays from an opening book for the first `max_plies` plies, then defers.
+
+    Wraps any strategy: positions past the book horizon, or without a move
+    seen in `min_games` games, go to `fallback`.
+    """
+    cancellable = True
+
+    def __init__(self, book, fallback, max_plies=None, min_games=3):
+        self.book = book
+        self.fallback = fallback
+        self.max_plies = book.max_plies if max_plies is None else max_plies
+        self.min_games = min_games
+        self.hits = 0
+
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General",
+                    cancel=None):
+        ply = sum(1 for row in board for cell in row if cell)
+        if ply < self.max_plies:
+            move = self.book.lookup(board, game_mode, self.min_games)
+            if move is not None:
+                self.hits += 1
+                sos_stats.count("book.hits")
+                return move
+        return choose_move_cancellable(self.fallback, cancel, board, board_size, letter_choices,
+                                       player_color, game_mode)
+
+
+for _strategy in (RandomStrategy, SmartStrategy, OllamaStrategy, AlphaBetaStrategy,
+                  MCTSStrategy, TablebaseStrategy, BookStrategy):
+    sos_stats.instrument(_strategy, "choose_move")
@@ -0,0 +1,104 @@
+"""Vectorized NumPy simulator that steps many SOS games at once."""
+import numpy as np
+
+EMPTY, S, O = 0, 1, 2
+BLUE, RED = 0, 1
+DRAW = -1
+LETTER_CODES = {'S': S, 'O': O}
+PLAYER_NAMES = ("Blue", "Red")
+
+
+def count_sos(boards):
+    """Counts complete SOS lines on each board of a (B, n, n) array."""
+    s = boards == S
+    o = boards == O
+    return (
+        (s[:, :, :-2] & o[:, :, 1:-1] & s[:, :, 2:]).sum(axis=(1, 2))        # rows
+        + (s[:, :-2, :] & o[:, 1:-1, :] & s[:, 2:, :]).sum(axis=(1, 2))      # columns
+        + (s[:, :-2, :-2] & o[:, 1:-1, 1:-1] & s[:, 2:, 2:]).sum(axis=(1, 2))  # diagonals
+        + (s[:, :-2, 2:] & o[:, 1:-1, 1:-1] & s[:, 2:, :-2]).sum(axis=(1, 2))  # anti-diagonals
+    )
+
+
+class BatchGame:
+    """B independent SOS games held as one (B, n, n) int8 array.
+
+    Follows BaseGame's rules: the mover is credited every SOS its letter
+    completes, the turn always passes afterwards, Simple games end on the
+    first SOS and every game ends when its board is full.
+    """
+    def __init__(self, batch_size, board_size, game_mode):
+        self.batch_size = batch_size
+        self.board_size = board_size
+        self.game_mode = game_mode
+        self.reset()
+
+    def reset(self):
+        """Clears every board and score."""
+        b, n = self.batch_size, self.board_size
+        self.boards = np.zeros((b, n, n), dtype=np.int8)
+        self.current_player = np.full(b, BLUE, dtype=np.int8)
+        self.total_moves = np.zeros(b, dtype=np.int32)
+        self.points = np.zeros((b, 2), dtype=np.int32)
+        self.game_over = np.zeros(b, dtype=bool)
+        self._lines = np.zeros(b, dtype=np.int32)
+
+    @property
+    def blue_points(self):
+        return self.points[:, BLUE]
+
+    @property
+    def red_points(self):
+        return self.points[:, RED]
+
+    def step(self, rows, cols, letters):
+        """Applies one move per game; returns points each move scored.
+
+        `letters` holds S/O codes. Moves on finished games or occupied
+        cells are ignored (they score 0 and do not pass the turn).
+        """
+        idx = np.arange(self.batch_size)
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        legal = ~self.game_over & (self.boards[idx, rows, cols] == EMPTY)
+        self.boards[idx[legal], rows[legal], cols[legal]] = np.asarray(letters, dtype=np.int8)[legal]
+        self.total_moves += legal
+
+        lines = count_sos(self.boards)
+        gained = np.where(legal, lines - self._lines, 0)
+        self._lines = lines
+        self.points[idx, self.current_player] += gained
+
+        full = self.total_moves == self.board_size ** 2
+        if self.game_mode == "Simple":
+            finished = full | (self.points.sum(axis=1) > 0)
+        else:
+            finished = full
+        self.game_over |= legal & finished
+        switch = legal & ~self.game_over
+        self.current_player[switch] ^= 1
+        return gained
+
+    def random_moves(self, rng):
+        """Draws a uniformly random empty cell and letter for every game."""
+        flat = self.boards.reshape(self.batch_size, -1)
+        weights = rng.random(flat.shape) * (flat == EMPTY)
+        cells = weights.argmax(axis=1)
+        letters = rng.integers(S, O + 1, size=self.batch_size, dtype=np.int8)
+        return cells // self.board_size, cells % self.board_size, letters
+
+    def play_random(self, rng=None):
+        """Plays every unfinished game to the end with random moves."""
+        rng = np.random.default_rng(rng)
+        while not self.game_over.all():
+            self.step(*self.random_moves(rng))
+        return self.winners()
+
+    def winners(self):
+        """Per-game BLUE, RED or DRAW codes, as BaseGame.get_winner decides."""
+        blue, red = self.blue_points, self.red_points
+        return np.where(blue > red, BLUE, np.where(red > blue, RED, DRAW))
+
+    def winner_names(self):
+        """Per-game 'Blue', 'Red' or 'Draw'."""
+        return [PLAYER_NAMES[w] if w != DRAW else "Draw" for w in self.winners()]
@@ -0,0 +1,185 @@
+"""Reproducible benchmarks for the game logic and strategies.
+
+Prints one JSON document; pass --baseline to compare against an earlier run
+and exit non-zero when any benchmark slows down past --tolerance.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from sos_logic import ENGINES, create_game
+from sos_selfplay import STRATEGIES
+
+
+def _timed(fn, repeat):
+    """Runs `fn` `repeat` times; returns per-run seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _record(name, samples, ops, **params):
+    per_op = [s / ops for s in samples]
+    return {
+        'name': name,
+        'params': params,
+        'ops': ops,
+        'min_us': min(per_op) * 1e6,
+        'median_us': statistics.median(per_op) * 1e6,
+    }
+
+
+def _random_moves(board_size, seed):
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(board_size) for c in range(board_size)]
+    rng.shuffle(cells)
+    return [(r, c, rng.choice('SO')) for r, c in cells]
+
+
+def bench_make_move(engine, board_size, repeat, track_threats=False):
+    moves = _random_moves(board_size, seed=board_size)
+
+    def run():
+        game = create_game(board_size, "General", engine, track_threats=track_threats)
+        for r, c, letter in moves:
+            game.make_move(r, c, letter)
+            game.switch_player()
+    params = {'track_threats': True} if track_threats else {}
+    return _record('make_move', _timed(run, repeat), len(moves),
+                   engine=engine, board_size=board_size, **params)
+
+
+def bench_check_for_sos(engine, board_size, repeat):
+    moves = _random_moves(board_size, seed=board_size)
+    game = create_game(board_size, "General", engine)
+    for r, c, letter in moves:
+        game.make_move(r, c, letter)
+
+    def run():
+        for r, c, _ in moves:
+            game.check_for_sos(r, c)
+    return _record('check_for_sos', _timed(run, repeat), len(moves),
+                   engine=engine, board_size=board_size)
+
+
+def bench_random_game(engine, board_size, game_mode, repeat, games=20):
+    games_moves = [_random_moves(board_size, seed) for seed in range(games)]
+
+    def run():
+        for moves in games_moves:
+            game = create_game(board_size, game_mode, engine)
+            for r, c, letter in moves:
+                game.make_move(r, c, letter)
+                if game.check_game_over():
+                    break
+                game.switch_player()
+    return _record('random_game', _timed(run, repeat), games,
+                   engine=engine, board_size=board_size, game_mode=game_mode)
+
+
+def bench_choose_move(strategy_name, board_size, game_mode, repeat, positions=5):
+    strategy = STRATEGIES[strategy_name]()
+    boards = []
+    for seed in range(positions):
+        game = create_game(board_size, game_mode)
+        for r, c, letter in _random_moves(board_size, seed)[:board_size]:
+            game.make_move(r, c, letter)
+            game.switch_player()
+        if not game.check_game_over():
+            boards.append((game.board, game.current_player))
+
+    def run():
+        for board, player in boards:
+            strategy.choose_move(board, board_size, {}, player, game_mode=game_mode)
+    return _record('choose_move', _timed(run, repeat), max(1, len(boards)),
+                   strategy=strategy_name, board_size=board_size, game_mode=game_mode)
+
+
+def run_suite(sizes, strategies, repeat):
+    """Runs every benchmark; returns the list of result records."""
+    results = []
+    for engine in ENGINES:
+        for n in sizes:
+            results.append(bench_make_move(engine, n, repeat))
+            results.append(bench_make_move(engine, n, repeat, track_threats=True))
+            results.append(bench_check_for_sos(engine, n, repeat))
+            for mode in ("Simple", "General"):
+                results.append(bench_random_game(engine, n, mode, repeat))
+    for name in strategies:
+        for n in sizes:
+            results.append(bench_choose_move(name, n, "General", max(1, repeat // 5)))
+    return results
+
+
+def _key(record):
+    return record['name'], json.dumps(record['params'], sort_keys=True)
+
+
+def engine_speedups(results):
+    """Adds `vs_list` to engine records: the list engine's median over theirs."""
+    by_key = {_key(rec): rec for rec in results}
+    for rec in results:
+        engine = rec['params'].get('engine')
+        if engine in (None, 'list'):
+            continue
+        base = by_key.get(_key({**rec, 'params': {**rec['params'], 'engine': 'list'}}))
+        if base:
+            rec['vs_list'] = base['median_us'] / rec['median_us']
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns records whose median slowed by more than `tolerance` (a ratio)."""
+    previous = {_key(rec): rec for rec in baseline['results']}
+    regressions = []
+    for rec in results:
+        old = previous.get(_key(rec))
+        if old and rec['median_us'] > old['median_us'] * (1 + tolerance):
+            regressions.append({**rec, 'baseline_median_us': old['median_us']})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SOS game logic and strategies.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(range(3, 9)))
+    parser.add_argument('--strategies', nargs='*', default=['random', 'alphabeta', 'mcts'],
+                        choices=STRATEGIES,
+                        help="strategies to time (LLM-backed ones need a running server)")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="write JSON here instead of stdout")
+    parser.add_argument('--baseline', help="JSON from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': engine_speedups(run_suite(args.sizes, args.strategies, args.repeat)),
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report['results'], json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Opening book built from recorded games, keyed by canonical position."""
+import argparse
+import json
+
+from sos_logic import BaseGame, canonical_transforms, inverse_transform_cell, transform_cell
+from sos_records import iter_games
+
+
+def read_text_record(path):
+    """Reads a 'sos_replay.txt'-style file into (board_size, game_mode, moves)."""
+    with open(path) as f:
+        size, mode = f.readline().strip().split(',')
+        moves = []
+        for line in f:
+            if line.strip():
+                p, l, r, c = line.strip().split(',')
+                moves.append((p, l, int(r), int(c)))
+    return int(size), mode, moves
+
+
+class OpeningBook:
+    """Per-position move statistics for the first `max_plies` plies of games.
+
+    Entries are keyed by (board size, mode, canonical board) and store, per
+    canonical move, how many games played it and the total score for the
+    player who made it (1 win, 0.5 draw, 0 loss).
+    """
+    def __init__(self, max_plies=6):
+        self.max_plies = max_plies
+        self.positions = {}
+
+    def add_game(self, board_size, game_mode, moves):
+        """Adds one recorded game of (player, letter, row, col) moves."""
+        game = BaseGame(board_size, game_mode)
+        keys = []
+        for ply, (player, letter, r, c) in enumerate(moves):
+            if ply < self.max_plies:
+                # On symmetric boards, equivalent moves share the smallest image
+                key, transforms = canonical_transforms(game.board)
+                move = min(transform_cell(r, c, board_size, t) for t in transforms) + (letter,)
+                keys.append(((board_size, game_mode, key), move, player))
+            game.current_player = player
+            game.make_move(r, c, letter)
+        winner = game.get_winner()
+        for position, move, player in keys:
+            stats = self.positions.setdefault(position, {}).setdefault(move, [0, 0.0])
+            stats[0] += 1
+            stats[1] += 1.0 if winner == player else 0.5 if winner == "Draw" else 0.0
+
+    def add_archive(self, path):
+        """Adds every game of a binary archive (see sos_records)."""
+        for record in iter_games(path):
+            self.add_game(*record)
+
+    def add_text_record(self, path):
+        """Adds the game in a 'sos_replay.txt'-style file."""
+        self.add_game(*read_text_record(path))
+
+    def lookup(self, board, game_mode, min_games=3):
+        """Returns the best-scoring known (row, col, letter) for `board`, or None.
+
+        Only moves seen in at least `min_games` games are considered.
+        """
+        n = len(board)
+        key, transforms = canonical_transforms(board)
+        t = transforms[0]
+        moves = self.positions.get((n, game_mode, key))
+        if not moves:
+            return None
+        candidates = [(total / count, count, move) for move, (count, total) in moves.items()
+                      if count >= min_games]
+        if not candidates:
+            return None
+        _, _, (r, c, letter) = max(candidates)
+        # Book moves are stored in the canonical frame; map back before checking
+        r, c = inverse_transform_cell(r, c, n, t)
+        if board[r][c] != "":
+            return None
+        return r, c, letter
+
+    def save(self, path):
+        entries = [[size, mode, key, [[r, c, l, count, total]
+                                      for (r, c, l), (count, total) in moves.items()]]
+                   for (size, mode, key), moves in self.positions.items()]
+        with open(path, 'w') as f:
+            json.dump({'max_plies': self.max_plies, 'positions': entries}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        book = cls(data['max_plies'])
+        for size, mode, key, moves in data['positions']:
+            book.positions[(size, mode, key)] = {
+                (r, c, l): [count, total] for r, c, l, count, total in moves}
+        return book
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an opening book from recorded games.")
+    parser.add_argument('sources', nargs='+',
+                        help="binary archives (.sosr) or sos_replay.txt-style files")
+    parser.add_argument('-o', '--output', default='sos_book.json')
+    parser.add_argument('-k', '--plies', type=int, default=6)
+    args = parser.parse_args(argv)
+
+    book = OpeningBook(args.plies)
+    for path in args.sources:
+        if path.endswith('.txt'):
+            book.add_text_record(path)
+        else:
+            book.add_archive(path)
+    book.save(args.output)
+    print(f"{args.output}: {len(book.positions)} positions")
+
+
+if __name__ == '__main__':
+    main()
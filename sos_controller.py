@@ -0,0 +1,111 @@
+"""Turn-loop controller shared by the GUI, self-play and the game server.
+
+A GameController owns one game's logic and applies moves in the order the
+GUI always has: place the letter, score it, check for game over, then pass
+the turn. It never blocks on a player; callers ask it whose turn it is and
+run computer moves however suits them (inline, on a thread, in an executor).
+"""
+from collections import namedtuple
+
+from sos_logic import create_game
+from sos_ai import RandomStrategy
+
+
+class IllegalMove(ValueError):
+    """Raised for a move off the board, on a taken cell, or after the game ended."""
+
+
+MoveResult = namedtuple("MoveResult", "player letter row col sequences points game_over")
+MoveResult.__doc__ = """One applied move: who played it, the SOS sequences it
+completed, the points it scored and whether it ended the game."""
+
+
+class GameController:
+    """Runs one game between two players.
+
+    `players` maps 'Blue' and 'Red' to a PlayerStrategy for computer players
+    or None for players whose moves arrive from outside (GUI clicks, network
+    clients).
+    """
+    def __init__(self, logic, players=None):
+        self.logic = logic
+        self.players = players or {'Blue': None, 'Red': None}
+        self.moves = []
+
+    @classmethod
+    def new(cls, board_size, game_mode, players=None, engine="list", **options):
+        """Starts a fresh game on the named engine (see sos_logic.create_game).
+
+        The game keeps a threat map unless `track_threats=False` is given, so
+        strategies can read it from the board instead of rebuilding it.
+        """
+        options.setdefault("track_threats", True)
+        return cls(create_game(board_size, game_mode, engine, **options), players)
+
+    @property
+    def current_player(self):
+        return self.logic.current_player
+
+    @property
+    def game_over(self):
+        return self.logic.check_game_over()
+
+    @property
+    def strategy(self):
+        """The strategy to move now, or None if the move comes from outside."""
+        return self.players[self.logic.current_player]
+
+    def computer_to_move(self):
+        return not self.game_over and self.strategy is not None
+
+    def play(self, row, col, letter):
+        """Plays `letter` at (row, col) for the current player; returns a MoveResult.
+
+        Raises IllegalMove, leaving the game unchanged, if the move is not legal.
+        """
+        logic = self.logic
+        n = logic.board_size
+        if self.game_over:
+            raise IllegalMove("the game is over")
+        if letter not in ('S', 'O'):
+            raise IllegalMove(f"letter must be S or O, not {letter!r}")
+        if not (0 <= row < n and 0 <= col < n):
+            raise IllegalMove(f"{row},{col} is off the {n}x{n} board")
+        player = logic.current_player
+        before = logic.blue_points + logic.red_points
+        if not logic.make_move(row, col, letter):
+            raise IllegalMove(f"cell {row},{col} is taken")
+        sequences = logic.check_for_sos(row, col)
+        self.moves.append((player, letter, row, col))
+        over = logic.check_game_over()
+        if not over:
+            logic.switch_player()
+        return MoveResult(player, letter, row, col, sequences,
+                          logic.blue_points + logic.red_points - before, over)
+
+    def computer_args(self):
+        """Positional arguments for the current strategy's choose_move.
+
+        The board is the game's strategy_board(): a copy (or, for sparse
+        games, a live view) that carries the game, so the call may run on
+        another thread or process as long as no move is played meanwhile.
+        """
+        return self.logic.strategy_board(), self.logic.board_size, {}, self.logic.current_player
+
+    def play_computer(self, move):
+        """Plays a move chosen by a strategy, substituting a random legal move
+        for an illegal or missing one so the game always progresses."""
+        if move is not None:
+            try:
+                return self.play(*move)
+            except IllegalMove:
+                pass
+        logic = self.logic
+        return self.play(*RandomStrategy().choose_move(
+            logic.board, logic.board_size, {}, logic.current_player, logic.game_mode))
+
+    def run_computer(self):
+        """Lets the current strategy choose and play a move on this thread."""
+        move = self.strategy.choose_move(*self.computer_args(),
+                                         game_mode=self.logic.game_mode)
+        return self.play_computer(move)
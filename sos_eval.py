@@ -0,0 +1,250 @@
+"""Learned static evaluation of SOS positions, scored in batches with NumPy.
+
+Positions are described by pattern features over every three-cell line
+(open S_S gaps, S O _ setups, cells that would give the opponent a point)
+and valued by a linear model fitted offline from self-play outcomes.
+"""
+import argparse
+import json
+
+import numpy as np
+
+from sos_batch import EMPTY, S, O, LETTER_CODES, BatchGame
+
+FEATURES = (
+    "bias",
+    "threats",          # lines one placement completes, per cell
+    "threat_cells",     # cells where some letter scores now, per cell
+    "has_threat",       # 1 if the side to move can score now
+    "setups",           # S__, __S and _O_ lines, per cell
+    "safe_cells",       # empty cells with a letter that neither scores nor gives a point, per cell
+    "safe_moves",       # such (cell, letter) placements, per cell
+    "quiet_parity",     # with no threat: +1 if the safe cells are odd in number, else -1
+    "empty_parity",     # +1 if the empty cells are odd in number, else -1
+    "empty",            # empty cells, per cell
+)
+
+# Fitted with `python sos_eval.py` (seed 0) on 20000 greedy self-play games per
+# mode on 4x4 to 8x8 boards.
+DEFAULT_WEIGHTS = {
+    "Simple": [-0.0500, 0.1600, 0.3898, 0.8450, 0.0661, 0.0912, 0.0422, 0.0127, 0.0696, -0.1226],
+    "General": [-0.0011, 0.0707, -0.0830, 0.0136, -0.0070, 0.0022, -0.0052, 0.0005, 0.0102, 0.0092],
+}
+
+
+def _windows(boards):
+    """Yields (a, b, c) slice triples over the lines of a (B, n, n) array, for
+    boards or any same-shaped per-cell map."""
+    yield boards[:, :, :-2], boards[:, :, 1:-1], boards[:, :, 2:]              # rows
+    yield boards[:, :-2, :], boards[:, 1:-1, :], boards[:, 2:, :]              # columns
+    yield boards[:, :-2, :-2], boards[:, 1:-1, 1:-1], boards[:, 2:, 2:]        # diagonals
+    yield boards[:, :-2, 2:], boards[:, 1:-1, 1:-1], boards[:, 2:, :-2]        # anti-diagonals
+
+
+def cell_maps(boards):
+    """Per-cell placement maps for a (B, n, n) board array.
+
+    Returns (scores_s, scores_o, gives_s, gives_o, setups): whether placing
+    S or O on each cell completes an SOS, whether it opens one for the
+    opponent, and the number of two-empty lines one move from a threat.
+    """
+    shape = boards.shape
+    scores = {S: np.zeros(shape, dtype=bool), O: np.zeros(shape, dtype=bool)}
+    gives = {S: np.zeros(shape, dtype=bool), O: np.zeros(shape, dtype=bool)}
+    setups = np.zeros(shape[0], dtype=np.int32)
+    empty = boards == EMPTY
+    is_s = boards == S
+    is_o = boards == O
+    maps = zip(_windows(empty), _windows(is_s), _windows(is_o),
+               _windows(scores[S]), _windows(scores[O]), _windows(gives[S]), _windows(gives[O]))
+    for (ea, eb, ec), (sa, _, sc), (_, ob, _), score_s, score_o, give_s, give_o in maps:
+        # Views into the per-cell maps, so |= updates them in place
+        score_s_a, _, score_s_c = score_s
+        _, score_o_b, _ = score_o
+        give_s_a, _, give_s_c = give_s
+        _, give_o_b, _ = give_o
+        # One empty cell: the line is a threat on that cell
+        score_s_a |= ea & ob & sc
+        score_o_b |= sa & eb & sc
+        score_s_c |= sa & ob & ec
+        # Two empty cells: filling one wrongly leaves a threat on the other
+        s_gap = sa & eb & ec
+        gap_s = ea & eb & sc
+        o_mid = ea & ob & ec
+        give_o_b |= s_gap | gap_s
+        give_s_c |= s_gap | o_mid
+        give_s_a |= gap_s | o_mid
+        setups += (s_gap | gap_s | o_mid).sum(axis=(1, 2))
+    return scores[S], scores[O], gives[S], gives[O], setups
+
+
+def features(boards):
+    """Returns the (B, len(FEATURES)) feature matrix of a (B, n, n) board array."""
+    boards = np.asarray(boards, dtype=np.int8)
+    cells = boards.shape[1] * boards.shape[2]
+    scores_s, scores_o, gives_s, gives_o, setups = cell_maps(boards)
+    empty = boards == EMPTY
+    threat_cells = scores_s | scores_o
+    quiet = empty & ~threat_cells
+    safe_s = quiet & ~gives_s
+    safe_o = quiet & ~gives_o
+    threats = np.zeros(boards.shape[0], dtype=np.int32)
+    is_s = boards == S
+    is_o = boards == O
+    for (ea, eb, ec), (sa, _, sc), (_, ob, _) in zip(_windows(empty), _windows(is_s), _windows(is_o)):
+        threats += ((ea & ob & sc) | (sa & eb & sc) | (sa & ob & ec)).sum(axis=(1, 2))
+    n_threat_cells = threat_cells.sum(axis=(1, 2))
+    n_safe = (safe_s | safe_o).sum(axis=(1, 2))
+    n_empty = empty.sum(axis=(1, 2))
+    out = np.empty((boards.shape[0], len(FEATURES)))
+    out[:, 0] = 1.0
+    out[:, 1] = threats / cells
+    out[:, 2] = n_threat_cells / cells
+    out[:, 3] = n_threat_cells > 0
+    out[:, 4] = setups / cells
+    out[:, 5] = n_safe / cells
+    out[:, 6] = (safe_s.sum(axis=(1, 2)) + safe_o.sum(axis=(1, 2))) / cells
+    out[:, 7] = np.where(n_threat_cells > 0, 0, np.where(n_safe % 2 == 1, 1, -1))
+    out[:, 8] = np.where(n_empty % 2 == 1, 1, -1)
+    out[:, 9] = n_empty / cells
+    return out
+
+
+def board_array(board):
+    """Converts a list-of-lists board of '', 'S', 'O' into an (n, n) int8 array."""
+    return np.array([[LETTER_CODES.get(cell, EMPTY) for cell in row] for row in board],
+                    dtype=np.int8)
+
+
+class Evaluator:
+    """Linear evaluation of positions for the side to move.
+
+    General values estimate the points the side to move will still gain
+    over the opponent; Simple values estimate the outcome, from -1 (loss)
+    to 1 (win). Full boards are worth 0.
+    """
+    def __init__(self, weights=None):
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        self.weights = {mode: np.asarray(w, dtype=float) for mode, w in weights.items()}
+
+    def evaluate(self, boards, game_mode):
+        """Values a (B, n, n) board array in one vectorized call."""
+        boards = np.asarray(boards, dtype=np.int8)
+        values = features(boards) @ self.weights[game_mode]
+        if game_mode == "Simple":
+            values = np.clip(values, -1.0, 1.0)
+        else:
+            values *= boards.shape[1] * boards.shape[2]
+        values[(boards != EMPTY).all(axis=(1, 2))] = 0.0
+        return values
+
+    def evaluate_children(self, game, moves):
+        """Values the positions after each (row, col, letter) move of `game`.
+
+        Values are for the player to move in each child, i.e. the opponent.
+        """
+        parent = board_array(game.board)
+        children = np.repeat(parent[None], len(moves), axis=0)
+        idx = np.arange(len(moves))
+        rows, cols, letters = zip(*moves)
+        children[idx, rows, cols] = [LETTER_CODES[letter] for letter in letters]
+        return self.evaluate(children, game.game_mode)
+
+    def save(self, path):
+        """Writes the weights as JSON."""
+        with open(path, 'w') as f:
+            json.dump({"features": FEATURES,
+                       "weights": {mode: list(w) for mode, w in self.weights.items()}}, f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """Reads weights written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        if tuple(data["features"]) != FEATURES:
+            raise ValueError(f"{path}: weights are for features {data['features']}")
+        return cls(data["weights"])
+
+
+def greedy_moves(game, rng, epsilon=0.1):
+    """Picks a move per game of a BatchGame: score if possible, else avoid
+    giving a point away; with probability `epsilon` a random move instead."""
+    scores_s, scores_o, gives_s, gives_o, _ = cell_maps(game.boards)
+    empty = game.boards == EMPTY
+    b, n = game.batch_size, game.board_size
+    quiet = empty & ~(scores_s | scores_o)
+    # Rank placements scoring > safe > any, breaking ties randomly
+    rank = np.stack([empty, empty], axis=-1).astype(float)
+    rank += np.stack([quiet & ~gives_s, quiet & ~gives_o], axis=-1)
+    rank += 2 * np.stack([scores_s, scores_o], axis=-1)
+    explore = rng.random(b) < epsilon
+    rank[explore] = np.stack([empty, empty], axis=-1)[explore]
+    rank = (rank + rng.random(rank.shape) * 0.5) * (rank > 0)
+    best = rank.reshape(b, -1).argmax(axis=1)
+    cells, letters = best // 2, np.where(best % 2 == 0, S, O).astype(np.int8)
+    return cells // n, cells % n, letters
+
+
+def self_play_samples(games, board_size, game_mode, rng=None, epsilon=0.1):
+    """Plays `games` greedy self-play games; returns (boards, targets).
+
+    Every position with an empty cell is a sample, labelled from the side
+    to move: the outcome (1, 0, -1) in Simple games, or the points it gains
+    over the opponent from there on, per cell, in General games.
+    """
+    rng = np.random.default_rng(rng)
+    game = BatchGame(games, board_size, game_mode)
+    boards, movers, points, alive = [], [], [], []
+    while not game.game_over.all():
+        boards.append(game.boards.copy())
+        movers.append(game.current_player.copy())
+        points.append(game.points.copy())
+        alive.append(~game.game_over)
+        game.step(*greedy_moves(game, rng, epsilon))
+    boards, movers, points, alive = map(np.stack, (boards, movers, points, alive))
+    if game_mode == "Simple":
+        winners = game.winners()
+        outcome = np.where(winners == -1, 0, np.where(winners[None] == movers, 1, -1))
+    else:
+        # Blue-minus-Red points still to come, seen from the mover
+        future = (game.points[:, 0] - game.points[:, 1])[None] - (points[..., 0] - points[..., 1])
+        outcome = np.where(movers == 0, future, -future) / board_size ** 2
+    return boards[alive], outcome[alive].astype(float)
+
+
+def fit(x, targets, ridge=1e-3):
+    """Least-squares weights (with a small ridge term) mapping a feature matrix to targets."""
+    return np.linalg.solve(x.T @ x + ridge * np.eye(x.shape[1]), x.T @ targets)
+
+
+def train(games, sizes, rng=None, epsilon=0.1):
+    """Fits an Evaluator for both modes from self-play on each board size."""
+    rng = np.random.default_rng(rng)
+    weights = {}
+    for mode in ("Simple", "General"):
+        x, y = [], []
+        for size in sizes:
+            boards, targets = self_play_samples(games, size, mode, rng, epsilon)
+            x.append(features(boards))
+            y.append(targets)
+        weights[mode] = fit(np.concatenate(x), np.concatenate(y))
+    return Evaluator(weights)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit evaluation weights from self-play.")
+    parser.add_argument('-n', '--games', type=int, default=20000,
+                        help="self-play games per board size and mode")
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[4, 5, 6, 7, 8])
+    parser.add_argument('-o', '--output', default='sos_eval.json')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    evaluator = train(args.games, args.sizes, args.seed)
+    evaluator.save(args.output)
+    for mode, w in evaluator.weights.items():
+        print(f"{mode}: " + ", ".join(f"{name}={v:.4f}" for name, v in zip(FEATURES, w)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,21 @@
 """CS449 Ryan Lee 5/9/25; Developed and tested in conjuncture with ChatGPT (o4-mini-high) following Google's Python Style Guide."""
+import logging
+import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
-from sos_logic import SOSGameLogic
+import sos_stats
+from sos_controller import GameController, IllegalMove
+from sos_logic import SOSGameLogic, SparseGame
+from sos_book import read_text_record
+from sos_records import RecordWriter, game_count, read_game
+from sos_replay import ReplayEngine
 import random
-from sos_ai import RandomStrategy, OllamaStrategy, SmartStrategy
+from sos_ai import (RandomStrategy, OllamaStrategy, SmartStrategy, AlphaBetaStrategy,
+                    MCTSStrategy, TablebaseStrategy, CancelToken, choose_move_cancellable)
+
+log = logging.getLogger(__name__)
 
 
 class Player:
@@ -29,8 +41,119 @@ class ComputerPlayer(Player):
         gui.root.after(500, gui._computer_move)
 
 
+class ButtonBoard:
+    """Board drawn as a grid of tk.Button widgets, one per cell."""
+    def __init__(self, parent, on_click):
+        self.parent = parent
+        self.on_click = on_click
+        self.buttons = []
+
+    def build(self, n):
+        for w in self.parent.winfo_children():
+            w.destroy()
+        self.buttons = [[None]*n for _ in range(n)]
+        for i in range(n):
+            for j in range(n):
+                btn = tk.Button(self.parent, text="", width=4, height=2,
+                                command=lambda r=i,c=j: self.on_click(r,c))
+                btn.grid(row=i, column=j)
+                self.buttons[i][j] = btn
+
+    def set_cell(self, row, col, letter, color=None):
+        if color is None:
+            self.buttons[row][col].config(text=letter)
+        else:
+            self.buttons[row][col].config(text=letter, fg=color)
+
+    def mark_sos(self, seq, color):
+        for r, c in seq:
+            self.buttons[r][c].config(fg=color)
+
+    def clear_cell(self, row, col):
+        self.buttons[row][col].config(text='', fg='black')
+
+    def clear(self):
+        for row in self.buttons:
+            for btn in row:
+                btn.config(text='', fg='black')
+
+
+class CanvasBoard:
+    """Board drawn on a single tk.Canvas.
+
+    Cells are canvas text items created on first use and reconfigured in
+    place, and SOS lines are separate overlay items, so a move redraws only
+    the cells it touches; board size only affects the one-off grid build.
+    """
+    def __init__(self, parent, on_click, pixels=560):
+        self.parent = parent
+        self.on_click = on_click
+        self.pixels = pixels
+        self.canvas = None
+        self.n = 0
+        self.cell = 0
+        self._items = {}
+
+    def build(self, n):
+        for w in self.parent.winfo_children():
+            w.destroy()
+        self.n = n
+        self.cell = max(6, self.pixels // n)
+        size = self.cell * n
+        self.canvas = tk.Canvas(self.parent, width=size, height=size, bg='white',
+                                highlightthickness=0)
+        self.canvas.pack()
+        self.canvas.bind("<Button-1>", self._click)
+        for k in range(n + 1):
+            self.canvas.create_line(0, k * self.cell, size, k * self.cell, fill='gray70')
+            self.canvas.create_line(k * self.cell, 0, k * self.cell, size, fill='gray70')
+        self._font = ("Arial", max(6, int(self.cell * 0.45)), 'bold')
+        self._items = {}
+
+    def _center(self, row, col):
+        return (col + 0.5) * self.cell, (row + 0.5) * self.cell
+
+    def _click(self, event):
+        row, col = int(event.y // self.cell), int(event.x // self.cell)
+        if 0 <= row < self.n and 0 <= col < self.n:
+            self.on_click(row, col)
+
+    def set_cell(self, row, col, letter, color=None):
+        item = self._items.get((row, col))
+        if item is None:
+            x, y = self._center(row, col)
+            self._items[(row, col)] = self.canvas.create_text(
+                x, y, text=letter, fill=color or 'black', font=self._font, tags='letter')
+        elif color is None:
+            self.canvas.itemconfigure(item, text=letter)
+        else:
+            self.canvas.itemconfigure(item, text=letter, fill=color)
+
+    def mark_sos(self, seq, color):
+        for r, c in seq:
+            self.canvas.itemconfigure(self._items[(r, c)], fill=color)
+        (x1, y1), (x2, y2) = self._center(*seq[0]), self._center(*seq[-1])
+        self.canvas.create_line(x1, y1, x2, y2, fill=color, width=max(1, self.cell // 12),
+                                tags='sos')
+
+    def clear_cell(self, row, col):
+        item = self._items.pop((row, col), None)
+        if item is not None:
+            self.canvas.delete(item)
+
+    def clear(self):
+        self.canvas.delete('letter', 'sos')
+        self._items = {}
+
+
 class SOSGameGUI:
     """GUI for the SOS game with optional recording and replay."""
+    AI_POLL_MS = 50
+    # Boards at least this big use the sparse engine and the canvas renderer
+    LARGE_BOARD = 9
+    BOARD_SIZES = (3, 4, 5, 6, 7, 8, 10, 20, 50, 100, 200)
+    RECORD_ARCHIVE = 'sos_games.sosr'
+
     def __init__(self, root):
         self.root = root
         self.root.title("SOS Game")
@@ -38,9 +161,14 @@ class SOSGameGUI:
         self.strategies = {
             'Random': RandomStrategy(),
             'Ollama': OllamaStrategy(),
-            'Smart': SmartStrategy()
+            'Smart': SmartStrategy(),
+            'AlphaBeta': AlphaBetaStrategy(),
+            'MCTS': MCTSStrategy(playouts=None, time_limit=1.0),
+            'Tablebase': TablebaseStrategy()
         }
         self.ai_type_var = tk.StringVar(value='Smart')
+        # Strategies keep per-search state, so each runs one search at a time
+        self._ai_locks = {name: threading.Lock() for name in self.strategies}
 
         # UI variables
         self.board_size_var = tk.IntVar(value=5)
@@ -50,17 +178,31 @@ class SOSGameGUI:
         self.blue_type = tk.StringVar(value="Human")
         self.red_type = tk.StringVar(value="Human")
         self.record_var = tk.BooleanVar()
+        self.renderer_var = tk.StringVar(value="Buttons")
 
         # Game state
         self.logic = None
+        self.controller = None
         self.n = 0
         self.buttons = []
+        self.board_view = None
         self.game_active = False
         self.record_moves = []
 
-        # Replay buffer
-        self._replay_moves = []
-        self._replay_index = 0
+        # Background AI computation; results are tagged with the game id
+        # they were computed for so stale ones can be dropped
+        self._game_id = 0
+        self._ai_results = queue.Queue()
+        self._ai_thread = None
+        self._ai_pending = False
+        self._ai_cancel = None
+
+        # Replay state: the engine for the loaded game, whether it is playing,
+        # and the pending after() job that advances it
+        self._replay = None
+        self._replay_playing = False
+        self._replay_job = None
+        self.replay_delay_var = tk.IntVar(value=500)
 
         self._create_widgets()
         self._start_new_game()
@@ -74,12 +216,14 @@ class SOSGameGUI:
         ctrl = tk.Frame(self.root)
         ctrl.pack(pady=5)
         tk.Label(ctrl, text="Board Size:").pack(side=tk.LEFT)
-        tk.OptionMenu(ctrl, self.board_size_var, *range(3, 9)).pack(side=tk.LEFT)
+        tk.OptionMenu(ctrl, self.board_size_var, *self.BOARD_SIZES).pack(side=tk.LEFT)
         tk.Label(ctrl, text="Game Mode:").pack(side=tk.LEFT, padx=(10,0))
         tk.Radiobutton(ctrl, text="Simple", variable=self.game_mode_var, value="Simple").pack(side=tk.LEFT)
         tk.Radiobutton(ctrl, text="General", variable=self.game_mode_var, value="General").pack(side=tk.LEFT)
         tk.Checkbutton(ctrl, text="Record Game", variable=self.record_var).pack(side=tk.LEFT, padx=(10,0))
         tk.Button(ctrl, text="Replay", command=self._replay_game).pack(side=tk.LEFT, padx=(10,0))
+        tk.Label(ctrl, text="Board:").pack(side=tk.LEFT, padx=(10,0))
+        tk.OptionMenu(ctrl, self.renderer_var, "Buttons", "Canvas").pack(side=tk.LEFT)
 
         # Main frame: player panels and board
         self.main_frame = tk.Frame(self.root)
@@ -99,6 +243,24 @@ class SOSGameGUI:
         tk.Label(ctrl, text="AI Style:").pack(side=tk.LEFT, padx=(10,0))
         tk.OptionMenu(ctrl, self.ai_type_var, *self.strategies.keys()).pack(side=tk.LEFT)
 
+        # Replay controls
+        replay_bar = tk.Frame(self.root)
+        replay_bar.pack()
+        tk.Button(replay_bar, text="<<", command=lambda: self._replay_seek(0)).pack(side=tk.LEFT)
+        tk.Button(replay_bar, text="<", command=lambda: self._replay_step(-1)).pack(side=tk.LEFT)
+        self.replay_play_button = tk.Button(replay_bar, text="Play", width=5,
+                                            command=self._toggle_replay)
+        self.replay_play_button.pack(side=tk.LEFT)
+        tk.Button(replay_bar, text=">", command=lambda: self._replay_step(1)).pack(side=tk.LEFT)
+        tk.Button(replay_bar, text=">>",
+                  command=lambda: self._replay_seek(len(self._replay.moves) if self._replay else 0)
+                  ).pack(side=tk.LEFT)
+        self.replay_scale = tk.Scale(replay_bar, from_=0, to=0, orient=tk.HORIZONTAL, length=240,
+                                     label="Ply", showvalue=True, command=self._on_replay_scrub)
+        self.replay_scale.pack(side=tk.LEFT, padx=(10,0))
+        tk.Scale(replay_bar, from_=20, to=2000, resolution=20, orient=tk.HORIZONTAL,
+                 label="ms/step", variable=self.replay_delay_var).pack(side=tk.LEFT, padx=(10,0))
+
         # New Game button
         tk.Button(self.root, text="New Game", command=self._start_new_game).pack(pady=10)
 
@@ -117,10 +279,29 @@ class SOSGameGUI:
         self.red_player  = HumanPlayer('Red')  if self.red_type.get()=='Human'  else ComputerPlayer('Red')
 
     def _start_new_game(self):
+        self._stop_replay()
+        self._replay = None
+
+        # Cancel any in-flight AI move from the previous game
+        self._game_id += 1
+        self._ai_pending = False
+        # The token belongs to that one call, so this holds even if its
+        # worker has not reached choose_move yet
+        if self._ai_cancel is not None:
+            self._ai_cancel.cancel()
+            self._ai_cancel = None
+
         # Initialize logic and state
         self.n = self.board_size_var.get()
-        self.logic = SOSGameLogic(self.n, self.game_mode_var.get())
+        large = self.n >= self.LARGE_BOARD
+        if large:
+            self.logic = SparseGame(self.n, self.game_mode_var.get(), track_threats=True)
+        else:
+            self.logic = SOSGameLogic(self.n, self.game_mode_var.get(), track_threats=True)
         self.logic.reset_board()
+        # Computer moves are chosen here (on a worker thread), so the controller
+        # only applies moves for both colours
+        self.controller = GameController(self.logic)
         self.game_active = True
         self.record_moves.clear()
 
@@ -130,15 +311,10 @@ class SOSGameGUI:
         self.turn_label.config(text=f"{self.logic.current_player} Player's Turn")
 
         # Build board
-        for w in self.board_frame.winfo_children():
-            w.destroy()
-        self.buttons = [[None]*self.n for _ in range(self.n)]
-        for i in range(self.n):
-            for j in range(self.n):
-                btn = tk.Button(self.board_frame, text="", width=4, height=2,
-                                command=lambda r=i,c=j: self.make_move(r,c))
-                btn.grid(row=i, column=j)
-                self.buttons[i][j] = btn
+        view_cls = CanvasBoard if large or self.renderer_var.get() == "Canvas" else ButtonBoard
+        self.board_view = view_cls(self.board_frame, self.make_move)
+        self.board_view.build(self.n)
+        self.buttons = getattr(self.board_view, 'buttons', [])
 
         # First player's turn
         current = self.logic.current_player
@@ -155,72 +331,109 @@ class SOSGameGUI:
             return
 
         letter = self.blue_letter.get() if self.logic.current_player == 'Blue' else self.red_letter.get()
-        if not self.logic.make_move(row, col, letter):
+        try:
+            result = self.controller.play(row, col, letter)
+        except IllegalMove:
             return
+        self._show_move(result)
 
+    def _show_move(self, result):
+        """Record and draw a move the controller applied, then hand over the turn."""
         # Record
         if self.record_var.get():
-            self.record_moves.append((self.logic.current_player, letter, row, col))
+            self.record_moves.append((result.player, result.letter, result.row, result.col))
 
         # **Update the button with the letter** and highlight any SOS
-        self._update_button(row, col, letter)
+        self._update_button(result.row, result.col, result.letter, result.sequences, result.player)
 
         # Game-over check
-        if self.logic.check_game_over():
+        if result.game_over:
             self._end_game()
             return
 
-        # Switch turn & possibly trigger the next player
-        self.logic.switch_player()
+        # The controller passed the turn; possibly trigger the next player
         self.turn_label.config(text=f"{self.logic.current_player} Player's Turn")
         next_obj = self.blue_player if self.logic.current_player == 'Blue' else self.red_player
         next_obj.take_turn(self)
 
-    def _update_button(self, row, col, letter):
-        """Update button text and highlight any SOS sequences."""
-        btn = self.buttons[row][col]
-        btn.config(text=letter)
-        sequences = self.logic.check_for_sos(row, col)
-        player_color = 'blue' if self.logic.current_player == 'Blue' else 'red'
+    def _update_button(self, row, col, letter, sequences, player):
+        """Update the cell's letter and highlight the SOS sequences it made."""
+        self.board_view.set_cell(row, col, letter)
+        player_color = 'blue' if player == 'Blue' else 'red'
         for seq in sequences:
-            for r, c in seq:
-                self.buttons[r][c].config(fg=player_color)
+            self.board_view.mark_sos(seq, player_color)
 
     def _computer_move(self):
-        """Perform a move for the computer."""
-        if not self.game_active:
+        """Start computing the computer's move on a worker thread."""
+        if not self.game_active or self._ai_pending:
             return
 
-        strat = self.strategies[self.ai_type_var.get()]
-        r, c, letter = strat.choose_move(
-            self.logic.board, self.n,
+        name = self.ai_type_var.get()
+        strat = self.strategies[name]
+        args = (
+            # The board carries the game's threat map; nothing else moves on
+            # this game while the AI thinks, and New Game builds a new one
+            self.logic.strategy_board(), self.n,
             {'Blue': self.blue_letter.get(), 'Red': self.red_letter.get()},
             self.logic.current_player
         )
-
-        # Apply the move
-        self.logic.make_move(r, c, letter)
-
-        # Record it (if enabled)
-        if self.record_var.get():
-            self.record_moves.append((self.logic.current_player, letter, r, c))
-
-        # **Update the button with the letter** and highlight any SOS
-        self._update_button(r, c, letter)
-
-        # Check for game over
-        if self.logic.check_game_over():
-            self._end_game()
+        game_id = self._game_id
+        self._ai_pending = True
+        self._ai_cancel = cancel = CancelToken()
+        self.turn_label.config(text=f"{self.logic.current_player} Player is thinking...")
+        self._ai_thread = threading.Thread(
+            target=self._ai_worker,
+            args=(game_id, strat, self._ai_locks[name], cancel, args, self.logic.game_mode),
+            daemon=True)
+        self._ai_thread.start()
+        self.root.after(self.AI_POLL_MS, self._poll_ai_result, game_id)
+
+    def _ai_worker(self, game_id, strat, lock, cancel, args, game_mode):
+        """Runs choose_move off the Tk thread and queues the result."""
+        # A cancelled search of the same strategy may still be unwinding;
+        # other strategies start at once
+        with lock:
+            if cancel.cancelled:
+                return
+            try:
+                move = choose_move_cancellable(strat, cancel, *args, game_mode=game_mode)
+            except Exception:
+                log.exception("%s failed to choose a move", type(strat).__name__)
+                move = None
+        self._ai_results.put((game_id, move))
+
+    def _poll_ai_result(self, game_id):
+        """Apply a finished AI move, dropping results from earlier games."""
+        if game_id != self._game_id or not self._ai_pending:
+            return
+        while True:
+            try:
+                result_id, move = self._ai_results.get_nowait()
+            except queue.Empty:
+                self.root.after(self.AI_POLL_MS, self._poll_ai_result, game_id)
+                return
+            if result_id == self._game_id:
+                break
+
+        self._ai_pending = False
+        self._ai_cancel = None
+        self._apply_computer_move(move)
+
+    def _apply_computer_move(self, move):
+        """Apply a computed move on the Tk thread and hand over the turn."""
+        if not self.game_active:
             return
 
-        # Switch turn & schedule next
-        self.logic.switch_player()
-        self.turn_label.config(text=f"{self.logic.current_player} Player's Turn")
-        next_obj = self.blue_player if self.logic.current_player == 'Blue' else self.red_player
-        next_obj.take_turn(self)
+        # Strategies validate their own moves; the controller only substitutes
+        # a random one for a failed or stray illegal move rather than losing the turn
+        self._show_move(self.controller.play_computer(move))
 
     def _end_game(self):
         self.game_active = False
+        sos_stats.game_summary(
+            board_size=self.n, game_mode=self.logic.game_mode,
+            winner=self.logic.get_winner(), moves=self.logic.total_moves,
+            blue_points=self.logic.blue_points, red_points=self.logic.red_points)
         # Write record file if needed
         if self.record_var.get() and self.record_moves:
             self._write_record_file()
@@ -231,46 +444,113 @@ class SOSGameGUI:
             messagebox.showinfo("Game Over",f"{winner} Player Wins!")
 
     def _write_record_file(self):
-        """Writes recorded moves to 'sos_replay.txt'."""
+        """Writes recorded moves to 'sos_replay.txt' and appends them to the archive."""
         with open('sos_replay.txt','w') as f:
             f.write(f"{self.n},{self.game_mode_var.get()}\n")
             for p,l,r,c in self.record_moves:
                 f.write(f"{p},{l},{r},{c}\n")
+        with RecordWriter(self.RECORD_ARCHIVE) as writer:
+            writer.write_game(self.n, self.logic.game_mode, self.record_moves)
 
     def _replay_game(self):
-        """Loads 'sos_replay.txt' and replays moves step by step."""
-        try:
-            with open('sos_replay.txt') as f:
-                header = f.readline().strip().split(',')
-                # ignore header for now
-                moves = []
-                for line in f:
-                    p,l,r,c = line.strip().split(',')
-                    moves.append((p,l,int(r),int(c)))
-        except FileNotFoundError:
-            return
-
-        # Prepare board
+        """Loads the latest archived game (or 'sos_replay.txt') and plays it."""
+        if os.path.exists(self.RECORD_ARCHIVE) and game_count(self.RECORD_ARCHIVE):
+            record = read_game(self.RECORD_ARCHIVE, -1)
+        else:
+            try:
+                record = read_text_record('sos_replay.txt')
+            except FileNotFoundError:
+                return
+        self._start_replay(*record)
+
+    def _start_replay(self, board_size, game_mode, moves):
+        self._stop_replay()
         self.game_active = False
-        for i in range(self.n):
-            for j in range(self.n):
-                btn = self.buttons[i][j]
-                btn.config(text='', fg='black')
-        self._replay_moves = moves
-        self._replay_index = 0
-        self._do_replay_step()
+        # Show the game on a board of its recorded size
+        large = board_size >= self.LARGE_BOARD
+        view_cls = CanvasBoard if large or self.renderer_var.get() == "Canvas" else ButtonBoard
+        if board_size != self.n or not isinstance(self.board_view, view_cls):
+            self.n = board_size
+            self.board_view = view_cls(self.board_frame, self.make_move)
+            self.board_view.build(board_size)
+            self.buttons = getattr(self.board_view, 'buttons', [])
+        else:
+            self.board_view.clear()
+        self._replay = ReplayEngine(board_size, game_mode, moves)
+        self.replay_scale.config(to=len(moves))
+        self._show_replay_frame(self._replay.seek(0))
+        self._toggle_replay()
+
+    def _stop_replay(self):
+        self._replay_playing = False
+        self.replay_play_button.config(text="Play")
+        if self._replay_job is not None:
+            self.root.after_cancel(self._replay_job)
+            self._replay_job = None
+
+    def _toggle_replay(self):
+        if self._replay is None:
+            return
+        if self._replay_playing:
+            self._stop_replay()
+            return
+        if self._replay.at_end:
+            self._replay_seek(0)
+        self._replay_playing = True
+        self.replay_play_button.config(text="Pause")
+        self._replay_job = self.root.after(self.replay_delay_var.get(), self._do_replay_step)
 
     def _do_replay_step(self):
-        if self._replay_index >= len(self._replay_moves):
+        self._replay_job = None
+        if self._replay is None or not self._replay_playing:
             return
-        p,l,r,c = self._replay_moves[self._replay_index]
-        btn = self.buttons[r][c]
-        btn.config(text=l, fg='blue' if p=='Blue' else 'red')
-        self._replay_index += 1
-        self.root.after(500, self._do_replay_step)
+        self._show_replay_frame(self._replay.step())
+        if self._replay.at_end:
+            self._stop_replay()
+        else:
+            self._replay_job = self.root.after(self.replay_delay_var.get(), self._do_replay_step)
+
+    def _replay_step(self, plies):
+        if self._replay is not None:
+            self._stop_replay()
+            self._show_replay_frame(self._replay.step(plies))
+
+    def _replay_seek(self, ply):
+        if self._replay is not None:
+            self._show_replay_frame(self._replay.seek(ply))
+
+    def _on_replay_scrub(self, value):
+        # Also fires when _show_replay_frame moves the slider; that seek is a no-op
+        if self._replay is not None and int(value) != self._replay.ply:
+            self._show_replay_frame(self._replay.seek(int(value)))
+
+    def _show_replay_frame(self, frame):
+        """Redraws only the cells a replay frame changes."""
+        view = self.board_view
+        if frame.reset:
+            view.clear()
+        for (r, c), cell in frame.changes.items():
+            if cell is None:
+                view.clear_cell(r, c)
+            else:
+                letter, player = cell
+                view.set_cell(r, c, letter, 'blue' if player == 'Blue' else 'red')
+        self.replay_scale.set(frame.ply)
+        self.turn_label.config(text=f"Replay {frame.ply}/{len(self._replay.moves)}: "
+                                    f"Blue {frame.blue_points} - Red {frame.red_points}")
+
+
+for _name in ("_start_new_game", "_update_button", "_do_replay_step"):
+    sos_stats.instrument(SOSGameGUI, _name)
 
 
 if __name__=='__main__':
+    # SOS_STATS=path enables instrumentation and writes the stats there on exit
+    stats_path = os.environ.get('SOS_STATS')
+    if stats_path:
+        sos_stats.enable()
     root = tk.Tk()
     app = SOSGameGUI(root)
     root.mainloop()
+    if stats_path:
+        sos_stats.export_json(stats_path)
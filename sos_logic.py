@@ -1,9 +1,18 @@
 import random
+from functools import lru_cache
+
+import sos_stats
 
 
 class BaseGame:
-    """Handles the core SOS game logic."""
-    def __init__(self, board_size, game_mode):
+    """Handles the core SOS game logic.
+
+    With `track_threats`, `threats` maps every (row, col, letter) placement
+    that would complete an SOS right now to the points it is worth; it is
+    updated around each made or unmade move. Call `rebuild_threats` after
+    assigning `board` directly.
+    """
+    def __init__(self, board_size, game_mode, track_threats=False):
         self.board_size = board_size
         self.game_mode = game_mode
         self.board = [["" for _ in range(board_size)] for _ in range(board_size)]
@@ -11,6 +20,19 @@ class BaseGame:
         self.total_moves = 0
         self.blue_points = 0
         self.red_points = 0
+        self.move_history = []
+        self.threats = {} if track_threats else None
+
+    @classmethod
+    def from_board(cls, board, game_mode, current_player="Blue", track_threats=False):
+        """Builds a game positioned at an existing board; scores start at zero."""
+        game = cls(len(board), game_mode, track_threats=track_threats)
+        game.board = [list(row) for row in board]
+        game.total_moves = sum(1 for row in board for cell in row if cell)
+        game.current_player = current_player
+        if track_threats:
+            game.rebuild_threats()
+        return game
 
     def reset_board(self):
         """Resets the game state to start a new match."""
@@ -19,6 +41,9 @@ class BaseGame:
         self.total_moves = 0
         self.blue_points = 0
         self.red_points = 0
+        self.move_history.clear()
+        if self.threats is not None:
+            self.threats.clear()
 
     def switch_player(self):
         """Switches turn to the other player."""
@@ -27,6 +52,8 @@ class BaseGame:
     def make_move(self, row, col, letter):
         """Attempts to place a letter; returns True if successful."""
         if self.board[row][col] == "":
+            self.move_history.append((row, col, self.current_player,
+                                      self.blue_points, self.red_points))
             self.board[row][col] = letter
             self.total_moves += 1
             sequences = self.check_for_sos(row, col)
@@ -36,49 +63,123 @@ class BaseGame:
                     self.blue_points += points
                 else:
                     self.red_points += points
+            if self.threats is not None:
+                self._refresh_threats(row, col, "", letter)
             return True
         return False
 
+    def unmake_move(self):
+        """Reverts the most recent make_move; returns its (row, col)."""
+        row, col, player, blue_points, red_points = self.move_history.pop()
+        letter = self.cell(row, col) if self.threats is not None else None
+        self._clear_cell(row, col)
+        self.total_moves -= 1
+        self.current_player = player
+        self.blue_points = blue_points
+        self.red_points = red_points
+        if self.threats is not None:
+            self._refresh_threats(row, col, letter, "")
+        return row, col
+
+    def cell(self, row, col):
+        """Returns the letter at (row, col), or "" if it is empty."""
+        return self.board[row][col]
+
+    def _clear_cell(self, row, col):
+        self.board[row][col] = ""
+
+    def _triples(self, row, col):
+        return sos_line_index(self.board_size)[row][col]
+
+    def strategy_board(self):
+        """Returns the board to hand a strategy: a GameBoard copy carrying this game.
+
+        Strategies can read maintained state such as `threats` through its
+        `game` instead of rebuilding it; the game must not change meanwhile.
+        """
+        return GameBoard(self)
+
+    def empty_cells(self):
+        """Returns the (row, col) cells that are still empty."""
+        board = self.board
+        return [(r, c) for r in range(self.board_size) for c in range(self.board_size)
+                if board[r][c] == ""]
+
+    def best_threat(self):
+        """Returns the (row, col, letter) worth the most points now, or None."""
+        if not self.threats:
+            return None
+        return max(self.threats, key=self.threats.get)
+
+    def rebuild_threats(self):
+        """Recomputes the threat map from scratch for the current board."""
+        self.threats = {}
+        n = self.board_size
+        self._update_threats([(r, c) for r in range(n) for c in range(n)])
+
+    def _refresh_threats(self, row, col, old, new):
+        """Adjusts the threat map after (row, col) changed from `old` to `new`.
+
+        Only triples through (row, col) can change, so each empty cell on one
+        of them has its entry moved by that triple's contribution.
+        """
+        # Per-cell reads, since some engines build `board` on each access
+        cell = self.cell
+        threats = self.threats
+        lines = self._triples(row, col)
+        for seq in lines['S'] + lines['O']:
+            x = seq.index((row, col))
+            delta = (new == "SOS"[x]) - (old == "SOS"[x])
+            if not delta:
+                continue
+            for y in range(3):
+                ry, cy = seq[y]
+                if y == x or cell(ry, cy) != "":
+                    continue
+                rz, cz = seq[3 - x - y]
+                if cell(rz, cz) != "SOS"[3 - x - y]:
+                    continue
+                key = (ry, cy, "SOS"[y])
+                points = threats.get(key, 0) + delta
+                if points:
+                    threats[key] = points
+                else:
+                    del threats[key]
+        if new:
+            threats.pop((row, col, 'S'), None)
+            threats.pop((row, col, 'O'), None)
+        else:
+            self._update_threats([(row, col)])
+
+    def _update_threats(self, cells):
+        cell = self.cell
+        threats = self.threats
+        for r, c in cells:
+            for letter in ('S', 'O'):
+                points = 0
+                if cell(r, c) == "":
+                    # (r, c) is empty, so it only ever satisfies its own slot
+                    for (r1, c1), (rm, cm), (r2, c2) in self._triples(r, c)[letter]:
+                        if ((cell(r1, c1) == 'S' or (r1, c1) == (r, c))
+                                and (cell(rm, cm) == 'O' or (rm, cm) == (r, c))
+                                and (cell(r2, c2) == 'S' or (r2, c2) == (r, c))):
+                            points += 1
+                if points:
+                    threats[(r, c, letter)] = points
+                else:
+                    threats.pop((r, c, letter), None)
+
     def check_for_sos(self, row, col):
         """Returns list of SOS sequences formed by the last move."""
-        sequences = []
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                      (0, -1),           (0, 1),
-                      (1, -1),  (1, 0),  (1, 1)]
         letter = self.board[row][col]
-        for dr, dc in directions:
-            # O-center check
-            if letter == 'O':
-                r1, c1 = row - dr, col - dc
-                r2, c2 = row + dr, col + dc
-                if (0 <= r1 < self.board_size and 0 <= c1 < self.board_size and
-                    0 <= r2 < self.board_size and 0 <= c2 < self.board_size):
-                    if self.board[r1][c1] == 'S' and self.board[r2][c2] == 'S':
-                        sequences.append([(r1, c1), (row, col), (r2, c2)])
-            # S-centered checks
-            elif letter == 'S':
-                # O before S
-                r_o, c_o = row - dr, col - dc
-                r_s, c_s = row - 2*dr, col - 2*dc
-                if (0 <= r_o < self.board_size and 0 <= c_o < self.board_size and
-                    0 <= r_s < self.board_size and 0 <= c_s < self.board_size):
-                    if self.board[r_o][c_o] == 'O' and self.board[r_s][c_s] == 'S':
-                        sequences.append([(r_s, c_s), (r_o, c_o), (row, col)])
-                # S before O
-                r_o2, c_o2 = row + dr, col + dc
-                r_s2, c_s2 = row + 2*dr, col + 2*dc
-                if (0 <= r_o2 < self.board_size and 0 <= c_o2 < self.board_size and
-                    0 <= r_s2 < self.board_size and 0 <= c_s2 < self.board_size):
-                    if self.board[r_o2][c_o2] == 'O' and self.board[r_s2][c_s2] == 'S':
-                        sequences.append([(row, col), (r_o2, c_o2), (r_s2, c_s2)])
-        # Deduplicate
-        unique, seen = [], set()
-        for seq in sequences:
-            key = tuple(sorted(seq))
-            if key not in seen:
-                seen.add(key)
-                unique.append(seq)
-        return unique
+        if letter not in ('S', 'O'):
+            return []
+        board = self.board
+        return [list(seq)
+                for seq in sos_line_index(self.board_size)[row][col][letter]
+                if board[seq[0][0]][seq[0][1]] == 'S'
+                and board[seq[1][0]][seq[1][1]] == 'O'
+                and board[seq[2][0]][seq[2][1]] == 'S']
 
     def check_game_over(self):
         """Returns True if the game should end."""
@@ -102,6 +203,431 @@ class BaseGame:
             return "Red"
         return "Draw"
 
+    def canonical_form(self):
+        """Returns (key, transform) for the board's canonical symmetric image.
+
+        See `canonicalize`; `transform` maps this board's cells into the
+        canonical frame via `transform_cell`.
+        """
+        return canonicalize(self.board)
+
+
+# The 8 dihedral symmetries of a square board, as (row, col, n - 1) -> cell.
+# Index 0 is the identity; 1-3 rotate 90/180/270 degrees clockwise; 4-7 mirror.
+_SYMMETRIES = (
+    lambda r, c, m: (r, c),
+    lambda r, c, m: (c, m - r),
+    lambda r, c, m: (m - r, m - c),
+    lambda r, c, m: (m - c, r),
+    lambda r, c, m: (r, m - c),
+    lambda r, c, m: (m - r, c),
+    lambda r, c, m: (c, r),
+    lambda r, c, m: (m - c, m - r),
+)
+_INVERSE_SYMMETRY = (0, 3, 2, 1, 4, 5, 6, 7)
+SYMMETRY_COUNT = len(_SYMMETRIES)
+
+
+def transform_cell(row, col, board_size, transform):
+    """Maps (row, col) through symmetry `transform` (0-7)."""
+    return _SYMMETRIES[transform](row, col, board_size - 1)
+
+
+def inverse_transform_cell(row, col, board_size, transform):
+    """Maps a cell in the transformed frame back to the original board."""
+    return _SYMMETRIES[_INVERSE_SYMMETRY[transform]](row, col, board_size - 1)
+
+
+@lru_cache(maxsize=None)
+def _symmetry_orders(board_size):
+    """For each symmetry, the source cells read in row-major order of the image."""
+    cells = [(r, c) for r in range(board_size) for c in range(board_size)]
+    orders = []
+    for t in range(SYMMETRY_COUNT):
+        order = [None] * len(cells)
+        for r, c in cells:
+            tr, tc = transform_cell(r, c, board_size, t)
+            order[tr * board_size + tc] = (r, c)
+        orders.append(tuple(order))
+    return tuple(orders)
+
+
+def canonicalize(board):
+    """Returns (key, transform) for the smallest of a board's 8 symmetric images.
+
+    `key` is the image as a row-major string with '.' for empty cells, so
+    symmetric positions share it; `transform` is the symmetry that produces
+    that image (map moves in with transform_cell, out with
+    inverse_transform_cell).
+    """
+    best_key, best_t = None, 0
+    for t, order in enumerate(_symmetry_orders(len(board))):
+        key = "".join(board[r][c] or "." for r, c in order)
+        if best_key is None or key < best_key:
+            best_key, best_t = key, t
+    return best_key, best_t
+
+
+def canonical_transforms(board):
+    """Like canonicalize, but returns every symmetry that yields the key.
+
+    More than one means the board is symmetric, so moves related by those
+    symmetries are equivalent.
+    """
+    images = [("".join(board[r][c] or "." for r, c in order), t)
+              for t, order in enumerate(_symmetry_orders(len(board)))]
+    key = min(images)[0]
+    return key, [t for image, t in images if image == key]
+
+
+_DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1),
+               (0, -1),           (0, 1),
+               (1, -1),  (1, 0),  (1, 1)]
+
+
+def cell_triples(board_size, row, col):
+    """Returns {'S': triples, 'O': triples} for one cell; see sos_line_index."""
+    def inside(r, c):
+        return 0 <= r < board_size and 0 <= c < board_size
+
+    per_letter = {}
+    # O sits in the middle; S sits at either end of the line
+    for letter, offsets in (('O', [(-1, 0, 1)]), ('S', [(-2, -1, 0), (0, 1, 2)])):
+        triples, seen = [], set()
+        for dr, dc in _DIRECTIONS:
+            for steps in offsets:
+                seq = tuple((row + k * dr, col + k * dc) for k in steps)
+                key = tuple(sorted(seq))
+                if key in seen or not all(inside(r, c) for r, c in seq):
+                    continue
+                seen.add(key)
+                triples.append(seq)
+        per_letter[letter] = tuple(triples)
+    return per_letter
+
+
+_cached_cell_triples = lru_cache(maxsize=1 << 14)(cell_triples)
+
+
+@lru_cache(maxsize=None)
+def sos_line_index(board_size):
+    """Maps each cell to the SOS triples it can complete, per placed letter.
+
+    Returns index[row][col] -> {'S': triples, 'O': triples}, where each triple
+    is ((r, c), (r, c), (r, c)) in S-O-S order. Built once per board size and
+    shared by every game of that size.
+    """
+    return tuple(tuple(cell_triples(board_size, row, col) for col in range(board_size))
+                 for row in range(board_size))
+
+
+@lru_cache(maxsize=None)
+def bitboard_lines(board_size):
+    """Converts sos_line_index into bitmask form, indexed by cell (row * size + col).
+
+    Returns lines[cell] -> {'S': entries, 'O': entries}, where each entry is
+    (s_mask, o_mask, triple): the triple is complete once both S cells are
+    set in the S mask and the middle cell in the O mask.
+    """
+    def bit(cell):
+        return 1 << (cell[0] * board_size + cell[1])
+
+    return tuple(
+        {letter: tuple((bit(seq[0]) | bit(seq[2]), bit(seq[1]), seq) for seq in triples)
+         for letter, triples in per_letter.items()}
+        for index_row in sos_line_index(board_size)
+        for per_letter in index_row
+    )
+
+
+@lru_cache(maxsize=None)
+def _bitboard_counts(board_size):
+    """Per cell, the masks make_move tests to count the SOS a placement completes.
+
+    Returns (s_lines, o_lines): s_lines[cell] holds (other S bit, O bit)
+    pairs for an S placed on `cell`; o_lines[cell] holds the two-S masks
+    for an O placed there.
+    """
+    lines = bitboard_lines(board_size)
+    s_lines = tuple(tuple((s_mask & ~(1 << cell), o_mask) for s_mask, o_mask, _ in per['S'])
+                    for cell, per in enumerate(lines))
+    o_lines = tuple(tuple(s_mask for s_mask, _, _ in per['O']) for per in lines)
+    return s_lines, o_lines
+
+
+class BitboardGame(BaseGame):
+    """SOS game logic backed by S and O occupancy bitmasks.
+
+    Behaves like BaseGame, but `board` is a read-only snapshot rebuilt from
+    the masks on every access (use `cell` for single reads); assigning a
+    list of lists to it loads that position. Only 'S' and 'O' can be placed.
+    Plays faster than the list engine, but not with `track_threats`: the
+    threat map is kept up to date one cell at a time.
+    """
+    def __init__(self, board_size, game_mode, track_threats=False):
+        self.s_bits = 0
+        self.o_bits = 0
+        self._lines = bitboard_lines(board_size)
+        self._s_lines, self._o_lines = _bitboard_counts(board_size)
+        super().__init__(board_size, game_mode, track_threats=track_threats)
+
+    @property
+    def board(self):
+        n = self.board_size
+        return [[self._letter_at(r * n + c) for c in range(n)] for r in range(n)]
+
+    @board.setter
+    def board(self, rows):
+        n = self.board_size
+        s_bits = o_bits = 0
+        for cell, letter in enumerate(letter for row in rows[:n] for letter in row[:n]):
+            if letter == 'S':
+                s_bits |= 1 << cell
+            elif letter == 'O':
+                o_bits |= 1 << cell
+        self.s_bits, self.o_bits = s_bits, o_bits
+
+    def _letter_at(self, cell):
+        bit = 1 << cell
+        if self.s_bits & bit:
+            return 'S'
+        if self.o_bits & bit:
+            return 'O'
+        return ""
+
+    def cell(self, row, col):
+        return self._letter_at(row * self.board_size + col)
+
+    def _update_threats(self, cells):
+        # Same counts as make_move's tables, without going through `cell`
+        n = self.board_size
+        s_bits, o_bits = self.s_bits, self.o_bits
+        threats = self.threats
+        for r, c in cells:
+            cell = r * n + c
+            empty = not (s_bits | o_bits) & (1 << cell)
+            s_points = o_points = 0
+            if empty:
+                for s_bit, o_bit in self._s_lines[cell]:
+                    if s_bits & s_bit and o_bits & o_bit:
+                        s_points += 1
+                for s_mask in self._o_lines[cell]:
+                    if s_bits & s_mask == s_mask:
+                        o_points += 1
+            for letter, points in (('S', s_points), ('O', o_points)):
+                if points:
+                    threats[(r, c, letter)] = points
+                else:
+                    threats.pop((r, c, letter), None)
+
+    def make_move(self, row, col, letter):
+        """Attempts to place a letter; returns True if successful."""
+        n = self.board_size
+        # row * n + col would alias an off-board cell onto another one
+        if not (0 <= row < n and 0 <= col < n):
+            raise IndexError(f"cell {row},{col} is off the {n}x{n} board")
+        cell = row * n + col
+        bit = 1 << cell
+        s_bits, o_bits = self.s_bits, self.o_bits
+        if (s_bits | o_bits) & bit:
+            return False
+        # Count completed lines inline; the placed bit itself never needs testing
+        points = 0
+        if letter == 'S':
+            for s_bit, o_bit in self._s_lines[cell]:
+                if s_bits & s_bit and o_bits & o_bit:
+                    points += 1
+            self.s_bits = s_bits | bit
+        elif letter == 'O':
+            for s_mask in self._o_lines[cell]:
+                if s_bits & s_mask == s_mask:
+                    points += 1
+            self.o_bits = o_bits | bit
+        else:
+            return False
+        self.move_history.append((row, col, self.current_player,
+                                  self.blue_points, self.red_points))
+        self.total_moves += 1
+        if points:
+            if self.current_player == "Blue":
+                self.blue_points += points
+            else:
+                self.red_points += points
+        if self.threats is not None:
+            self._refresh_threats(row, col, "", letter)
+        return True
+
+    def _clear_cell(self, row, col):
+        mask = ~(1 << (row * self.board_size + col))
+        self.s_bits &= mask
+        self.o_bits &= mask
+
+    def check_for_sos(self, row, col):
+        """Returns list of SOS sequences formed by the last move."""
+        cell = row * self.board_size + col
+        letter = self._letter_at(cell)
+        if not letter:
+            return []
+        s_bits, o_bits = self.s_bits, self.o_bits
+        return [list(seq) for s_mask, o_mask, seq in self._lines[cell][letter]
+                if s_bits & s_mask == s_mask and o_bits & o_mask]
+
+
+class GameBoard(list):
+    """A list-of-rows copy of a game's board that keeps the game as `game`,
+    as SparseBoard does for sparse games."""
+    def __init__(self, game):
+        super().__init__(list(row) for row in game.board)
+        self.game = game
+
+
+class SparseBoard:
+    """Read-only `board[row][col]` view of a SparseGame, without a dense copy."""
+    def __init__(self, game):
+        self.game = game
+
+    def __len__(self):
+        return self.game.board_size
+
+    def __getitem__(self, row):
+        return _SparseRow(self.game._cells, row, self.game.board_size)
+
+    def __iter__(self):
+        return (self[r] for r in range(self.game.board_size))
+
+    def empty_cells(self):
+        """The game's live empty-cell list; do not modify it."""
+        return self.game.empty_cells()
+
+
+class _SparseRow:
+    __slots__ = ("_cells", "_row", "_n")
+
+    def __init__(self, cells, row, n):
+        self._cells = cells
+        self._row = row
+        self._n = n
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(self)[col]
+        return self._cells.get((self._row, col), "")
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        return (self._cells.get((self._row, c), "") for c in range(self._n))
+
+    def copy(self):
+        return list(self)
+
+
+class SparseGame(BaseGame):
+    """SOS game logic for large boards, storing only occupied cells.
+
+    Occupied cells live in a dict and empty cells in a list with a position
+    map, so placing, undoing, scoring and picking an empty cell cost the same
+    on a 200x200 board as on a 3x3 one. SOS triples are generated per move
+    instead of from a whole-board index. `board` is a SparseBoard view.
+    """
+    def __init__(self, board_size, game_mode, track_threats=False):
+        self._cells = {}
+        self._empties = []
+        self._empty_pos = {}
+        super().__init__(board_size, game_mode, track_threats=track_threats)
+
+    @property
+    def board(self):
+        return SparseBoard(self)
+
+    @board.setter
+    def board(self, rows):
+        n = self.board_size
+        self._cells = {(r, c): rows[r][c] for r in range(n) for c in range(n) if rows[r][c]}
+        self._empties = [(r, c) for r in range(n) for c in range(n) if not rows[r][c]]
+        self._empty_pos = {cell: i for i, cell in enumerate(self._empties)}
+
+    def empty_cells(self):
+        return self._empties
+
+    def strategy_board(self):
+        # The live view; copying would cost a dense board
+        return self.board
+
+    def random_empty_cell(self, rng=random):
+        """Returns a uniformly random empty cell in O(1)."""
+        return self._empties[rng.randrange(len(self._empties))]
+
+    def _take_empty(self, cell):
+        i = self._empty_pos.pop(cell)
+        last = self._empties.pop()
+        if last != cell:
+            self._empties[i] = last
+            self._empty_pos[last] = i
+
+    def make_move(self, row, col, letter):
+        """Attempts to place a letter; returns True if successful."""
+        if (row, col) in self._cells or not 0 <= row < self.board_size \
+                or not 0 <= col < self.board_size:
+            return False
+        self.move_history.append((row, col, self.current_player,
+                                  self.blue_points, self.red_points))
+        self._cells[(row, col)] = letter
+        self._take_empty((row, col))
+        self.total_moves += 1
+        points = len(self.check_for_sos(row, col))
+        if points:
+            if self.current_player == "Blue":
+                self.blue_points += points
+            else:
+                self.red_points += points
+        if self.threats is not None:
+            self._refresh_threats(row, col, "", letter)
+        return True
+
+    def cell(self, row, col):
+        return self._cells.get((row, col), "")
+
+    def _clear_cell(self, row, col):
+        del self._cells[(row, col)]
+        self._empty_pos[(row, col)] = len(self._empties)
+        self._empties.append((row, col))
+
+    def _triples(self, row, col):
+        return _cached_cell_triples(self.board_size, row, col)
+
+    def check_for_sos(self, row, col):
+        """Returns list of SOS sequences formed by the last move."""
+        cells = self._cells
+        letter = cells.get((row, col))
+        if letter not in ('S', 'O'):
+            return []
+        return [list(seq) for seq in self._triples(row, col)[letter]
+                if cells.get(seq[0]) == 'S' and cells.get(seq[1]) == 'O'
+                and cells.get(seq[2]) == 'S']
+
+
+ENGINES = {
+    "list": BaseGame,
+    "bitboard": BitboardGame,
+    "sparse": SparseGame,
+}
+
+
+def create_game(board_size, game_mode, engine="list", **options):
+    """Builds a game using the named engine from ENGINES."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine!r}")
+    return ENGINES[engine](board_size, game_mode, **options)
+
+
 # Alias for clarity in GUI
 class SOSGameLogic(BaseGame):
     pass
+
+
+for _engine in ENGINES.values():
+    for _name in ("make_move", "unmake_move", "check_for_sos"):
+        if _name in vars(_engine):
+            sos_stats.instrument(_engine, _name)
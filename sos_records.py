@@ -0,0 +1,140 @@
+"""Compact binary archive of recorded games with a random-access index.
+
+Layout of the data file: a 4-byte magic, then games back to back. Each game
+is a header (board size u16, mode u8, move width u8, move count u32) and one
+little-endian integer per move packing cell * 4 + player * 2 + letter, where
+player is 0 Blue / 1 Red and letter is 0 S / 1 O. Moves take 2 bytes on
+boards up to 128x128 and 4 bytes above. A sidecar `<path>.idx` holds the
+u64 byte offset of each game so game K can be read without scanning.
+"""
+import os
+import struct
+from collections import namedtuple
+
+MAGIC = b"SOSR"
+GAME_HEADER = struct.Struct("<HBBI")
+OFFSET = struct.Struct("<Q")
+MODES = ("Simple", "General")
+PLAYERS = ("Blue", "Red")
+LETTERS = ("S", "O")
+
+GameRecord = namedtuple("GameRecord", "board_size game_mode moves")
+GameRecord.__doc__ = "One recorded game; `moves` are (player, letter, row, col) tuples."
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def _move_format(board_size):
+    return "H" if board_size * board_size * 4 <= 1 << 16 else "I"
+
+
+def encode_game(board_size, game_mode, moves):
+    """Packs a game into bytes."""
+    fmt = _move_format(board_size)
+    packed = [(r * board_size + c) * 4 + PLAYERS.index(p) * 2 + LETTERS.index(l)
+              for p, l, r, c in moves]
+    return (GAME_HEADER.pack(board_size, MODES.index(game_mode), struct.calcsize(fmt), len(moves))
+            + struct.pack(f"<{len(moves)}{fmt}", *packed))
+
+
+def _read_game(f):
+    """Reads the game at the file position, or returns None at end of file."""
+    header = f.read(GAME_HEADER.size)
+    if not header:
+        return None
+    board_size, mode, width, count = GAME_HEADER.unpack(header)
+    fmt = "H" if width == 2 else "I"
+    values = struct.unpack(f"<{count}{fmt}", f.read(count * width))
+    moves = []
+    for v in values:
+        cell, flags = divmod(v, 4)
+        r, c = divmod(cell, board_size)
+        moves.append((PLAYERS[flags >> 1], LETTERS[flags & 1], r, c))
+    return GameRecord(board_size, MODES[mode], moves)
+
+
+def _check_magic(f, path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} is not an SOS game archive")
+
+
+class RecordWriter:
+    """Appends games to an archive and its index; usable as a context manager."""
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new and not os.path.exists(index_path(path)):
+            build_index(path)
+        self._data = open(path, "ab")
+        self._index = open(index_path(path), "ab")
+        if new:
+            self._data.write(MAGIC)
+
+    def write_game(self, board_size, game_mode, moves):
+        """Appends one game; returns its index in the archive."""
+        offset = self._data.tell()
+        self._data.write(encode_game(board_size, game_mode, moves))
+        self._index.write(OFFSET.pack(offset))
+        return self._index.tell() // OFFSET.size - 1
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_games(path):
+    """Yields GameRecords one at a time without loading the whole archive."""
+    with open(path, "rb") as f:
+        _check_magic(f, path)
+        while True:
+            game = _read_game(f)
+            if game is None:
+                return
+            yield game
+
+
+def game_count(path):
+    """Number of games in an archive, from its index."""
+    return os.path.getsize(index_path(path)) // OFFSET.size
+
+
+def read_game(path, k):
+    """Reads game `k` (negative counts from the end) using the index."""
+    count = game_count(path)
+    if k < 0:
+        k += count
+    if not 0 <= k < count:
+        raise IndexError(f"game {k} out of range for {count} games")
+    with open(index_path(path), "rb") as idx:
+        idx.seek(k * OFFSET.size)
+        offset, = OFFSET.unpack(idx.read(OFFSET.size))
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return _read_game(f)
+
+
+def build_index(path):
+    """Rewrites the index by scanning the archive; returns the game count."""
+    offsets = []
+    with open(path, "rb") as f:
+        _check_magic(f, path)
+        while True:
+            offset = f.tell()
+            header = f.read(GAME_HEADER.size)
+            if not header:
+                break
+            _, _, width, count = GAME_HEADER.unpack(header)
+            f.seek(count * width, os.SEEK_CUR)
+            offsets.append(offset)
+    with open(index_path(path), "wb") as idx:
+        for offset in offsets:
+            idx.write(OFFSET.pack(offset))
+    return len(offsets)
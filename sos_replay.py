@@ -0,0 +1,98 @@
+"""Keyframed replay of recorded games with seeking in either direction.
+
+A ReplayEngine scores the recorded moves once, keeps a snapshot of the
+board and score every few plies, and reconstructs any ply from the nearest
+snapshot plus the moves since. Seeking returns only the cells that differ
+from the previous position, so a view can redraw just those.
+"""
+import math
+from collections import namedtuple
+
+from sos_logic import create_game
+
+ReplayFrame = namedtuple("ReplayFrame", "ply reset changes blue_points red_points")
+ReplayFrame.__doc__ = """The position after `ply` moves, as an update to the
+previous frame: `changes` maps (row, col) to (letter, player), or to None for
+a cell to clear. With `reset`, the view should clear the board first and
+`changes` holds every occupied cell."""
+
+
+class ReplayEngine:
+    """Seekable replay of one game's (player, letter, row, col) moves.
+
+    Snapshots are taken every `keyframe_interval` plies; by default about
+    4 * sqrt(moves), which keeps both snapshot memory and the moves replayed
+    per reconstruction small on large boards.
+    """
+    # Boards from this size up are scored on the sparse engine
+    SPARSE_SIZE = 9
+
+    def __init__(self, board_size, game_mode, moves, keyframe_interval=None):
+        self.board_size = board_size
+        self.game_mode = game_mode
+        self.moves = list(moves)
+        if keyframe_interval is None:
+            keyframe_interval = max(16, 4 * math.isqrt(len(self.moves)))
+        self.keyframe_interval = keyframe_interval
+        engine = "sparse" if board_size >= self.SPARSE_SIZE else "list"
+        game = create_game(board_size, game_mode, engine)
+        cells = {}
+        self._gains = []            # points each move scored
+        self._keyframes = [({}, 0, 0)]
+        for ply, (player, letter, r, c) in enumerate(self.moves, 1):
+            before = game.blue_points + game.red_points
+            game.current_player = player
+            game.make_move(r, c, letter)
+            self._gains.append(game.blue_points + game.red_points - before)
+            cells[(r, c)] = (letter, player)
+            if ply % keyframe_interval == 0:
+                self._keyframes.append((dict(cells), game.blue_points, game.red_points))
+        self.ply = 0
+
+    def __len__(self):
+        return len(self.moves)
+
+    def position(self, ply):
+        """Returns (cells, blue_points, red_points) after `ply` moves."""
+        ply = max(0, min(ply, len(self.moves)))
+        start = ply // self.keyframe_interval * self.keyframe_interval
+        cells = dict(self._keyframes[start // self.keyframe_interval][0])
+        for player, letter, r, c in self.moves[start:ply]:
+            cells[(r, c)] = (letter, player)
+        return (cells,) + self._score(ply)
+
+    def _score(self, ply):
+        start = ply // self.keyframe_interval * self.keyframe_interval
+        _, blue, red = self._keyframes[start // self.keyframe_interval]
+        for k in range(start, ply):
+            if self.moves[k][0] == "Blue":
+                blue += self._gains[k]
+            else:
+                red += self._gains[k]
+        return blue, red
+
+    def seek(self, ply):
+        """Moves to `ply` (clamped to the game) and returns the ReplayFrame update."""
+        ply = max(0, min(ply, len(self.moves)))
+        current, self.ply = self.ply, ply
+        lo, hi = min(current, ply), max(current, ply)
+        if ply < hi - lo:
+            # Rebuilding from a keyframe touches fewer cells than undoing the gap
+            cells, blue, red = self.position(ply)
+            return ReplayFrame(ply, True, cells, blue, red)
+        changes = {}
+        if ply > current:
+            for player, letter, r, c in self.moves[lo:hi]:
+                changes[(r, c)] = (letter, player)
+        else:
+            for player, letter, r, c in self.moves[lo:hi]:
+                changes[(r, c)] = None
+        return ReplayFrame(ply, False, changes, *self._score(ply))
+
+    def step(self, plies=1):
+        """Seeks `plies` forward (or back, if negative) from the current ply."""
+        return self.seek(self.ply + plies)
+
+    @property
+    def at_end(self):
+        return self.ply == len(self.moves)
@@ -0,0 +1,247 @@
+"""Headless self-play runner: plays strategies against each other without Tk."""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import sos_stats
+from sos_logic import ENGINES
+from sos_controller import GameController, IllegalMove
+from sos_records import RecordWriter
+from sos_ai import (RandomStrategy, SmartStrategy, OllamaStrategy,
+                    AlphaBetaStrategy, MCTSStrategy, TablebaseStrategy, BookStrategy)
+from sos_book import OpeningBook
+
+
+def _alphabeta_eval():
+    from sos_eval import Evaluator  # needs NumPy
+    return AlphaBetaStrategy(time_limit=0.1, evaluator=Evaluator())
+
+
+STRATEGIES = {
+    'random': RandomStrategy,
+    'smart': SmartStrategy,
+    'ollama': OllamaStrategy,
+    'alphabeta': lambda: AlphaBetaStrategy(time_limit=0.1),
+    'alphabeta-eval': _alphabeta_eval,
+    'mcts': lambda: MCTSStrategy(playouts=500, workers=1),
+    'tablebase': TablebaseStrategy,
+}
+
+
+def _game_turns(blue, red, board_size, game_mode, engine):
+    """Generator running one game; yields (strategy, board, player) for each
+    move request and expects the chosen move to be sent back.
+
+    Moves go through a GameController, as in the GUI. A strategy that
+    returns an illegal move has it replaced by a random one so the game
+    always progresses. Returns the result dict via StopIteration.
+    """
+    controller = GameController.new(board_size, game_mode, {'Blue': blue, 'Red': red}, engine)
+    logic = controller.logic
+    latencies = []
+    illegal = 0
+    while True:
+        player = logic.current_player
+        start = time.perf_counter()
+        move = yield controller.strategy, logic.strategy_board(), player
+        latencies.append(time.perf_counter() - start)
+        try:
+            result = controller.play(*move)
+        except IllegalMove:
+            illegal += 1
+            result = controller.play_computer(None)
+        if result.game_over:
+            break
+    sos_stats.game_summary(
+        board_size=board_size, game_mode=game_mode, winner=logic.get_winner(),
+        moves=logic.total_moves, blue_points=logic.blue_points, red_points=logic.red_points,
+        think_seconds=sum(latencies), illegal_moves=illegal)
+    return {
+        'winner': logic.get_winner(),
+        'blue_points': logic.blue_points,
+        'red_points': logic.red_points,
+        'moves': logic.total_moves,
+        'illegal_moves': illegal,
+        'latencies': latencies,
+        'record': controller.moves,
+    }
+
+
+def play_game(blue, red, board_size, game_mode, engine="list"):
+    """Plays one game between two strategies; returns a result dict."""
+    turns = _game_turns(blue, red, board_size, game_mode, engine)
+    try:
+        strategy, board, player = next(turns)
+        while True:
+            move = strategy.choose_move(board, board_size, {}, player, game_mode=game_mode)
+            strategy, board, player = turns.send(move)
+    except StopIteration as done:
+        return done.value
+
+
+async def play_game_async(blue, red, board_size, game_mode, engine="list"):
+    """Coroutine version of play_game.
+
+    Strategies with a choose_move_async method (OllamaStrategy) are awaited,
+    so many games can wait on the model at once; others run inline.
+    """
+    turns = _game_turns(blue, red, board_size, game_mode, engine)
+    try:
+        strategy, board, player = next(turns)
+        while True:
+            choose_async = getattr(strategy, 'choose_move_async', None)
+            if choose_async is not None:
+                move = await choose_async(board, board_size, {}, player, game_mode=game_mode)
+            else:
+                move = strategy.choose_move(board, board_size, {}, player, game_mode=game_mode)
+            strategy, board, player = turns.send(move)
+    except StopIteration as done:
+        return done.value
+
+
+def _play_named(args):
+    blue_name, red_name, board_size, game_mode, book_path, stats, engine = args
+    if stats:
+        # Collected per game and merged by the parent, since workers are separate processes
+        sos_stats.enable()
+        sos_stats.reset()
+    blue, red = STRATEGIES[blue_name](), STRATEGIES[red_name]()
+    if book_path:
+        book = OpeningBook.load(book_path)
+        blue, red = BookStrategy(book, blue), BookStrategy(book, red)
+    result = play_game(blue, red, board_size, game_mode, engine)
+    if stats:
+        result['stats'] = sos_stats.snapshot()
+    return result
+
+
+def run_match(blue_name, red_name, games, board_size, game_mode, workers=None, book_path=None,
+              stats=False, engine="list"):
+    """Plays `games` games across a process pool; returns (results, elapsed seconds).
+
+    With `book_path`, both players consult that opening book first. With
+    `stats`, each result carries a sos_stats snapshot for its game.
+    """
+    jobs = [(blue_name, red_name, board_size, game_mode, book_path, stats, engine)] * games
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_play_named(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_play_named, jobs, chunksize=max(1, games // 64)))
+    return results, time.perf_counter() - start
+
+
+def run_concurrent(blue_name, red_name, games, board_size, game_mode, book_path=None,
+                   engine="list"):
+    """Plays `games` games concurrently in one process with asyncio.
+
+    Meant for network-bound strategies: both players are shared by all
+    games, so pending OllamaStrategy requests from every game are in flight
+    together (bounded by the strategy's `concurrency`). Returns
+    (results, elapsed seconds).
+    """
+    blue, red = STRATEGIES[blue_name](), STRATEGIES[red_name]()
+    if book_path:
+        book = OpeningBook.load(book_path)
+        blue, red = BookStrategy(book, blue), BookStrategy(book, red)
+
+    async def _run():
+        return await asyncio.gather(*(play_game_async(blue, red, board_size, game_mode, engine)
+                                      for _ in range(games)))
+
+    start = time.perf_counter()
+    results = asyncio.run(_run())
+    return list(results), time.perf_counter() - start
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(results, elapsed):
+    """Aggregates win/draw rates, throughput and move-latency percentiles."""
+    games = len(results)
+    latencies = [t for res in results for t in res['latencies']]
+    summary = {
+        'games': games,
+        'blue_win_rate': sum(res['winner'] == 'Blue' for res in results) / games,
+        'red_win_rate': sum(res['winner'] == 'Red' for res in results) / games,
+        'draw_rate': sum(res['winner'] == 'Draw' for res in results) / games,
+        'games_per_second': games / elapsed if elapsed > 0 else float('inf'),
+        'illegal_moves': sum(res['illegal_moves'] for res in results),
+    }
+    for pct in (50, 90, 99):
+        summary[f'move_latency_p{pct}_ms'] = percentile(latencies, pct) * 1000
+    return summary
+
+
+def _game_count(text):
+    games = int(text)
+    if games < 1:
+        raise argparse.ArgumentTypeError(f"need at least one game, got {games}")
+    return games
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless SOS self-play matches.")
+    parser.add_argument('blue', choices=STRATEGIES)
+    parser.add_argument('red', choices=STRATEGIES)
+    parser.add_argument('-n', '--games', type=_game_count, default=100)
+    parser.add_argument('-s', '--size', type=int, default=5)
+    parser.add_argument('-m', '--mode', choices=('Simple', 'General'), default='General')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="process pool size (default: CPU count; 1 runs in-process)")
+    parser.add_argument('-e', '--engine', choices=ENGINES, default='list',
+                        help="game engine ('sparse' for large boards)")
+    parser.add_argument('--book', metavar='PATH',
+                        help="opening book (see sos_book) both players consult first")
+    parser.add_argument('--stats', metavar='PATH',
+                        help="collect instrumentation and write it here as JSON")
+    parser.add_argument('--concurrent', action='store_true',
+                        help="play all games concurrently in one process with asyncio "
+                             "(batches LLM requests; ignores --workers)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="append every game to this binary archive (see sos_records)")
+    args = parser.parse_args(argv)
+
+    if args.concurrent:
+        if args.stats:
+            sos_stats.enable()
+            sos_stats.reset()
+        results, elapsed = run_concurrent(args.blue, args.red, args.games, args.size, args.mode,
+                                          args.book, args.engine)
+        if args.stats:
+            sos_stats.export_json(args.stats)
+    else:
+        results, elapsed = run_match(args.blue, args.red, args.games, args.size, args.mode,
+                                     args.workers, args.book, bool(args.stats), args.engine)
+    if args.stats and not args.concurrent:
+        sos_stats.reset()
+        for res in results:
+            sos_stats.merge(res.pop('stats'))
+        sos_stats.export_json(args.stats)
+    if args.record:
+        with RecordWriter(args.record) as writer:
+            for res in results:
+                writer.write_game(args.size, args.mode, res['record'])
+    summary = summarize(results, elapsed)
+    print(f"{args.blue} (Blue) vs {args.red} (Red): {args.games} games, "
+          f"{args.size}x{args.size} {args.mode}")
+    print(f"  Blue wins {summary['blue_win_rate']:.1%}  Red wins {summary['red_win_rate']:.1%}  "
+          f"Draws {summary['draw_rate']:.1%}")
+    print(f"  {summary['games_per_second']:.1f} games/s, move latency "
+          f"p50 {summary['move_latency_p50_ms']:.2f} ms, "
+          f"p90 {summary['move_latency_p90_ms']:.2f} ms, "
+          f"p99 {summary['move_latency_p99_ms']:.2f} ms")
+    if summary['illegal_moves']:
+        print(f"  {summary['illegal_moves']} illegal moves replaced by random ones")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
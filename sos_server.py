@@ -0,0 +1,371 @@
+"""Asyncio SOS game server speaking line-delimited JSON over TCP, plus a load tester.
+
+One JSON object per line in each direction; requests on a connection are
+answered in order, and "id", if present, is echoed back:
+
+    {"op": "new", "size": 6, "mode": "General", "blue": "human", "red": "alphabeta"}
+    {"op": "move", "game": 1, "row": 0, "col": 2, "letter": "S"}
+    {"op": "state", "game": 1}
+    {"op": "close", "game": 1}
+
+Players are "human" (moves arrive from the client) or a sos_selfplay
+strategy name. After "new" and "move" the server plays computer moves until
+a human is to move or the game ends, and replies with every move applied:
+
+    {"ok": true, "game": 1, "moves": [["Blue", "S", 0, 2, 1], ...],
+     "turn": "Red", "over": false, "winner": null, "score": [1, 0]}
+
+Errors reply {"ok": false, "error": "..."}. Games belong to the connection
+that created them and end when it closes.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import sos_stats
+from sos_controller import GameController, IllegalMove
+from sos_logic import ENGINES
+from sos_selfplay import STRATEGIES, percentile
+
+HUMAN = "human"
+log = logging.getLogger(__name__)
+_local = threading.local()
+
+
+def _choose_move(name, board, board_size, player, game_mode):
+    """Runs strategy `name` in an executor worker.
+
+    Each worker thread or process keeps its own strategy instances, so no
+    two searches ever share one.
+    """
+    strategies = getattr(_local, "strategies", None)
+    if strategies is None:
+        strategies = _local.strategies = {}
+    strategy = strategies.get(name)
+    if strategy is None:
+        strategy = strategies[name] = STRATEGIES[name]()
+    return strategy.choose_move(board, board_size, {}, player, game_mode=game_mode)
+
+
+class _Session:
+    __slots__ = ("controller", "ai", "lock")
+
+    def __init__(self, controller, ai):
+        self.controller = controller
+        self.ai = ai                    # colour -> strategy name, or None for a human
+        self.lock = asyncio.Lock()
+
+
+class GameServer:
+    """Hosts many concurrent games in one process.
+
+    Computer moves run in `executor` (a thread pool by default). Backpressure
+    comes from three limits: each connection is served one request at a
+    time and its reply is drained before the next line is read, at most
+    `max_pending_ai` computer moves are queued on the executor, and at most
+    `max_sessions` games are open.
+    """
+    def __init__(self, host="127.0.0.1", port=8765, executor=None, max_sessions=10000,
+                 max_pending_ai=64, max_line=1 << 16):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.max_pending_ai = max_pending_ai
+        self.max_line = max_line
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._executor = executor
+        self._own_executor = executor is None
+        self._ai_slots = None
+        self._server = None
+
+    async def start(self):
+        """Starts listening; with port 0 the chosen port is stored in `port`."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor()
+        self._ai_slots = asyncio.Semaphore(self.max_pending_ai)
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port,
+                                                  limit=self.max_line)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        if self._own_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve_connection(self, reader, writer):
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"ok": false, "error": "request line too long"}\n')
+                    break
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    reply = await self._dispatch(request, owned)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"ok": False, "error": str(e) or type(e).__name__}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self.sessions.pop(game_id, None)
+            writer.close()
+
+    async def _dispatch(self, request, owned):
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+        op = request.get("op")
+        if op == "new":
+            return await self._new_game(request, owned)
+        if op not in ("move", "state", "close"):
+            raise ValueError(f"unknown op {op!r}")
+        game_id = request["game"]
+        if game_id not in owned:
+            raise ValueError(f"no game {game_id}")
+        session = self.sessions[game_id]
+        if op == "close":
+            owned.discard(game_id)
+            del self.sessions[game_id]
+            return {"ok": True, "game": game_id}
+        if op == "state":
+            reply = self._reply(game_id, session, [])
+            reply["board"] = ["".join(cell or "." for cell in row)
+                              for row in session.controller.logic.board]
+            return reply
+        async with session.lock:
+            if session.ai[session.controller.current_player] is not None:
+                raise ValueError("it is not a human player's turn")
+            try:
+                result = session.controller.play(int(request["row"]), int(request["col"]),
+                                                 str(request["letter"]).upper())
+            except IllegalMove as e:
+                return {"ok": False, "game": game_id, "error": str(e)}
+            moves = [result]
+            await self._computer_moves(session, moves)
+        return self._reply(game_id, session, moves)
+
+    async def _new_game(self, request, owned):
+        if len(self.sessions) >= self.max_sessions:
+            return {"ok": False, "error": "server full"}
+        size = int(request.get("size", 3))
+        mode = request.get("mode", "General")
+        engine = request.get("engine", "list")
+        if mode not in ("Simple", "General") or engine not in ENGINES or not 3 <= size <= 200:
+            raise ValueError("bad size, mode or engine")
+        ai = {}
+        for colour in ("Blue", "Red"):
+            name = request.get(colour.lower(), HUMAN)
+            if name != HUMAN and name not in STRATEGIES:
+                raise ValueError(f"unknown player {name!r}")
+            ai[colour] = None if name == HUMAN else name
+        session = _Session(GameController.new(size, mode, engine=engine), ai)
+        game_id = next(self._ids)
+        self.sessions[game_id] = session
+        owned.add(game_id)
+        moves = []
+        async with session.lock:
+            await self._computer_moves(session, moves)
+        return self._reply(game_id, session, moves)
+
+    async def _computer_moves(self, session, moves):
+        """Plays computer turns in the executor until a human is to move."""
+        controller = session.controller
+        loop = asyncio.get_running_loop()
+        while not controller.game_over:
+            name = session.ai[controller.current_player]
+            if name is None:
+                break
+            board, n, _, player = controller.computer_args()
+            async with self._ai_slots:
+                try:
+                    move = await loop.run_in_executor(self._executor, _choose_move, name, board, n,
+                                                      player, controller.logic.game_mode)
+                except Exception:
+                    log.exception("%s failed to choose a move", name)
+                    move = None
+            moves.append(controller.play_computer(move))
+
+    @staticmethod
+    def _reply(game_id, session, moves):
+        logic = session.controller.logic
+        over = session.controller.game_over
+        if over and moves:
+            sos_stats.game_summary(
+                board_size=logic.board_size, game_mode=logic.game_mode,
+                winner=logic.get_winner(), moves=logic.total_moves,
+                blue_points=logic.blue_points, red_points=logic.red_points)
+        return {
+            "ok": True,
+            "game": game_id,
+            "moves": [[m.player, m.letter, m.row, m.col, m.points] for m in moves],
+            "turn": logic.current_player,
+            "over": over,
+            "winner": logic.get_winner() if over else None,
+            "score": [logic.blue_points, logic.red_points],
+        }
+
+
+class Client:
+    """Minimal client: one request in flight per connection, shared by many games.
+
+    `latencies` collects each request's round-trip time, not counting time
+    spent waiting for the connection.
+    """
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+        self.latencies = []
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, **fields):
+        async with self._lock:
+            start = time.perf_counter()
+            self._writer.write(json.dumps(fields).encode() + b"\n")
+            await self._writer.drain()
+            line = await self._reader.readline()
+            self.latencies.append(time.perf_counter() - start)
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _load_game(client, size, mode, opponent, rng):
+    """Plays one game as a random human against `opponent`; returns moves played."""
+    empty = {(r, c) for r in range(size) for c in range(size)}
+    reply = await client.request(op="new", size=size, mode=mode, blue=HUMAN, red=opponent)
+    game_id = reply["game"]
+    moves = 0
+    while True:
+        for _, _, r, c, _ in reply["moves"]:
+            empty.discard((r, c))
+        moves += len(reply["moves"])
+        if reply["over"]:
+            break
+        r, c = rng.choice(sorted(empty))
+        reply = await client.request(op="move", game=game_id, row=r, col=c,
+                                     letter=rng.choice("SO"))
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+    await client.request(op="close", game=game_id)
+    return moves
+
+
+async def load_test(host, port, games, connections, size=5, mode="General", opponent="random",
+                    seed=0):
+    """Plays `games` concurrent games over `connections` connections.
+
+    Returns moves per second, requests per second and request-latency
+    percentiles in milliseconds.
+    """
+    rng = random.Random(seed)
+    clients = [await Client.connect(host, port) for _ in range(connections)]
+    start = time.perf_counter()
+    try:
+        moves = await asyncio.gather(*(
+            _load_game(clients[k % connections], size, mode, opponent, random.Random(rng.random()))
+            for k in range(games)))
+    finally:
+        for client in clients:
+            await client.close()
+    elapsed = time.perf_counter() - start
+    latencies = [t for client in clients for t in client.latencies]
+    summary = {
+        "games": games,
+        "moves": sum(moves),
+        "moves_per_second": sum(moves) / elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+    }
+    for pct in (50, 90, 99):
+        summary[f"latency_p{pct}_ms"] = percentile(latencies, pct) * 1000
+    return summary
+
+
+async def _serve(args):
+    executor = ProcessPoolExecutor(args.workers) if args.processes else ThreadPoolExecutor(args.workers)
+    server = await GameServer(args.host, args.port, executor, args.max_sessions,
+                              args.max_pending).start()
+    print(f"Serving SOS on {server.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _load(args):
+    server = None
+    port = args.port
+    if args.local:
+        server = await GameServer(args.host, 0).start()
+        port = server.port
+    try:
+        summary = await load_test(args.host, port, args.games, args.connections, args.size,
+                                  args.mode, args.opponent)
+    finally:
+        if server is not None:
+            await server.close()
+    print(f"{summary['games']} games, {summary['moves']} moves: "
+          f"{summary['moves_per_second']:.0f} moves/s, "
+          f"{summary['requests_per_second']:.0f} requests/s, latency "
+          f"p50 {summary['latency_p50_ms']:.2f} ms, p90 {summary['latency_p90_ms']:.2f} ms, "
+          f"p99 {summary['latency_p99_ms']:.2f} ms")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SOS game server and load tester.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the game server")
+    load = commands.add_parser('load', help="load-test a running server")
+    for sub in (serve, load):
+        sub.add_argument('--host', default='127.0.0.1')
+        sub.add_argument('--port', type=int, default=8765)
+    serve.add_argument('-w', '--workers', type=int, default=None,
+                       help="executor workers for computer moves")
+    serve.add_argument('--processes', action='store_true',
+                       help="run computer moves in worker processes instead of threads")
+    serve.add_argument('--max-sessions', type=int, default=10000)
+    serve.add_argument('--max-pending', type=int, default=64,
+                       help="computer moves queued on the executor before requests wait")
+    load.add_argument('-n', '--games', type=int, default=1000)
+    load.add_argument('-c', '--connections', type=int, default=50)
+    load.add_argument('-s', '--size', type=int, default=5)
+    load.add_argument('-m', '--mode', choices=('Simple', 'General'), default='General')
+    load.add_argument('--opponent', choices=STRATEGIES, default='random')
+    load.add_argument('--local', action='store_true',
+                      help="start a server in this process instead of connecting to one")
+    args = parser.parse_args(argv)
+    return asyncio.run(_serve(args) if args.command == 'serve' else _load(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Shared-memory game-state transport and a persistent search worker pool.
+
+A position is published once into a multiprocessing.shared_memory block with
+a fixed layout; pool tasks carry only the block name and a few scalars, and
+each worker decodes the position straight from shared memory.
+
+Layout (little-endian):
+
+    offset  size  field
+    0       4     magic b"SOSG"
+    4       1     layout version
+    5       1     game mode (0 Simple, 1 General)
+    6       2     board size n
+    8       1     player to move (0 Blue, 1 Red)
+    9       3     padding
+    12      4     moves played
+    16      4     Blue points
+    20      4     Red points
+    24      4     generation, bumped on every publish
+    28      n*n   cells row by row (0 empty, 1 S, 2 O)
+"""
+import multiprocessing
+import struct
+import sys
+import threading
+import weakref
+from multiprocessing import shared_memory
+
+from sos_logic import BaseGame
+
+MAGIC = b"SOSG"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHB3xIIII")
+MODES = ("Simple", "General")
+PLAYERS = ("Blue", "Red")
+
+
+def block_size(board_size):
+    """Bytes needed to hold a position on an n x n board."""
+    return HEADER.size + board_size * board_size
+
+
+def encode(buf, board, game_mode, current_player, total_moves=None, blue_points=0,
+           red_points=0, generation=0):
+    """Writes a position into `buf` (any writable buffer of block_size bytes)."""
+    n = len(board)
+    # String operations keep the per-cell work in C: every cell becomes
+    # "S,", "O," or ",", and each of those becomes one code byte
+    text = ",".join(map(",".join, board)) + ","
+    cells = text.replace("S,", "\x01").replace("O,", "\x02").replace(",", "\x00").encode("latin-1")
+    if total_moves is None:
+        total_moves = n * n - cells.count(0)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, MODES.index(game_mode), n,
+                     PLAYERS.index(current_player), total_moves, blue_points, red_points,
+                     generation)
+    buf[HEADER.size:HEADER.size + n * n] = cells
+
+
+def decode(buf):
+    """Reads a position from `buf` into a new BaseGame."""
+    magic, version, mode, n, player, moves, blue, red, _ = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not an SOS game-state block")
+    text = bytes(buf[HEADER.size:HEADER.size + n * n]).decode("latin-1")
+    cells = text.replace("\x00", ",").replace("\x01", "S,").replace("\x02", "O,").split(",")
+    game = BaseGame(n, MODES[mode])
+    game.board = [cells[r * n:(r + 1) * n] for r in range(n)]
+    game.current_player = PLAYERS[player]
+    game.total_moves = moves
+    game.blue_points = blue
+    game.red_points = red
+    return game
+
+
+def generation(buf):
+    """The generation counter of the position stored in `buf`."""
+    return HEADER.unpack_from(buf, 0)[-1]
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+class GameStateBlock:
+    """A shared-memory block holding one position, owned by the creating process.
+
+    The block is removed by close(), or at the latest when the object is
+    collected or the interpreter exits.
+    """
+    def __init__(self, max_board_size):
+        self.max_board_size = max_board_size
+        self.shm = shared_memory.SharedMemory(create=True, size=block_size(max_board_size))
+        self.generation = 0
+        self._finalizer = weakref.finalize(self, _release, self.shm)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, board, game_mode, current_player, total_moves=None, blue_points=0,
+                red_points=0):
+        """Stores a position; returns its generation number."""
+        if len(board) > self.max_board_size:
+            raise ValueError(f"board larger than {self.max_board_size}x{self.max_board_size}")
+        self.generation += 1
+        encode(self.shm.buf, board, game_mode, current_player, total_moves, blue_points,
+               red_points, self.generation)
+        return self.generation
+
+    def publish_game(self, game):
+        """Stores a BaseGame's board, scores, player and move count."""
+        return self.publish(game.board, game.game_mode, game.current_player, game.total_moves,
+                            game.blue_points, game.red_points)
+
+    def close(self):
+        """Releases and removes the block."""
+        self._finalizer()
+        self.shm = None
+
+
+def _attach(name):
+    """Opens an existing block without taking over its cleanup."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Pool workers share the owner's resource tracker, where registering the
+    # name again is a no-op, so the owner's unlink still clears it
+    return shared_memory.SharedMemory(name=name)
+
+
+# Worker-side cache: block name -> (SharedMemory, generation, decoded game)
+_attached = {}
+
+
+def _worker_game(name, expected):
+    entry = _attached.get(name)
+    if entry is None:
+        # The owner replaced its block (it outgrew the board); drop the old one
+        for old in _attached.values():
+            old[0].close()
+        _attached.clear()
+        entry = _attached[name] = [_attach(name), None, None]
+    shm = entry[0]
+    if entry[1] != expected:
+        game = decode(shm.buf)
+        if generation(shm.buf) != expected:
+            raise RuntimeError("shared position changed while a task was running")
+        entry[1], entry[2] = expected, game
+    return entry[2]
+
+
+def _run_task(name, expected, task, args):
+    game = _worker_game(name, expected)
+    try:
+        return task(game, *args)
+    except BaseException:
+        # The task may have left moves on the cached game; decode afresh next time
+        _attached[name][1] = None
+        raise
+
+
+class SearchPool:
+    """Persistent worker processes for root-split searches over shared positions.
+
+    `run` publishes the position into shared memory once and sends each
+    worker only the block name, a generation number and the task's small
+    arguments. `task` must be a module-level function taking the BaseGame
+    as its first argument; each worker decodes a position once and reuses
+    it, so a task must undo any moves it makes (make_move / unmake_move).
+    The block grows when a larger board arrives. A pool may be shared
+    between strategies and threads; calls to `run` take turns, since they
+    share the one block. Workers and the block are
+    released by close(), or failing that when the pool is collected or the
+    interpreter exits.
+    """
+    def __init__(self, workers=None, max_board_size=8):
+        self.workers = workers or multiprocessing.cpu_count()
+        self._pool = None
+        self._pool_finalizer = None
+        self._block = GameStateBlock(max_board_size)
+        self._lock = threading.Lock()
+
+    def run(self, game, task, arg_lists):
+        """Runs task(game, *args) for each args in `arg_lists`; returns the results."""
+        with self._lock:
+            if game.board_size > self._block.max_board_size:
+                self._block.close()
+                self._block = GameStateBlock(game.board_size)
+            expected = self._block.publish_game(game)
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.workers)
+                self._pool_finalizer = weakref.finalize(self, self._pool.terminate)
+            return self._pool.starmap(_run_task, [(self._block.name, expected, task, tuple(args))
+                                                  for args in arg_lists])
+
+    def close(self):
+        """Stops the workers and removes the shared block."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool_finalizer.detach()
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+            self._block.close()
@@ -0,0 +1,148 @@
+"""Opt-in instrumentation: latency histograms, counters and per-game summaries.
+
+Methods are registered with `instrument` at import time but only wrapped
+with timers while stats are enabled, so a disabled build runs the original
+functions untouched. `count` and `game_summary` are single flag checks when
+disabled.
+"""
+import functools
+import json
+import time
+
+_enabled = False
+_registry = []      # (owner, attribute name, label)
+_originals = {}     # (owner, attribute name) -> original function
+_latencies = {}     # label -> {'count', 'total_ns', 'max_ns', 'buckets'}
+_counters = {}
+_games = []
+
+
+def is_enabled():
+    return _enabled
+
+
+def _observe(label, elapsed_ns):
+    hist = _latencies.get(label)
+    if hist is None:
+        hist = _latencies[label] = {'count': 0, 'total_ns': 0, 'max_ns': 0, 'buckets': {}}
+    hist['count'] += 1
+    hist['total_ns'] += elapsed_ns
+    if elapsed_ns > hist['max_ns']:
+        hist['max_ns'] = elapsed_ns
+    # Power-of-two buckets: bucket b holds samples below 2**b ns
+    bucket = elapsed_ns.bit_length()
+    hist['buckets'][bucket] = hist['buckets'].get(bucket, 0) + 1
+
+
+def _timed(fn, label):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _observe(label, time.perf_counter_ns() - start)
+    return wrapper
+
+
+def _patch(owner, name, label):
+    _originals[(owner, name)] = owner.__dict__[name]
+    setattr(owner, name, _timed(owner.__dict__[name], label))
+
+
+def instrument(owner, name, label=None):
+    """Registers `owner.name` to be timed whenever stats are enabled."""
+    label = label or f"{owner.__name__}.{name}"
+    _registry.append((owner, name, label))
+    if _enabled:
+        _patch(owner, name, label)
+
+
+def enable():
+    """Starts collecting: wraps every registered method with a timer."""
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    for owner, name, label in _registry:
+        _patch(owner, name, label)
+
+
+def disable():
+    """Stops collecting and restores the original methods; data is kept."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    for (owner, name), original in _originals.items():
+        setattr(owner, name, original)
+    _originals.clear()
+
+
+def reset():
+    """Discards everything collected so far."""
+    _latencies.clear()
+    _counters.clear()
+    _games.clear()
+
+
+def count(name, n=1):
+    """Adds `n` to counter `name` (nodes searched, cache hits, retries, ...)."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def game_summary(**fields):
+    """Records one finished game's summary fields."""
+    if _enabled:
+        _games.append(fields)
+
+
+def snapshot():
+    """Returns all collected data as plain, JSON-serialisable values."""
+    latencies = {}
+    for label, hist in _latencies.items():
+        latencies[label] = {
+            'count': hist['count'],
+            'mean_us': hist['total_ns'] / hist['count'] / 1000,
+            'max_us': hist['max_ns'] / 1000,
+            'p50_us': _bucket_percentile(hist, 50),
+            'p99_us': _bucket_percentile(hist, 99),
+            'buckets': {str(b): n for b, n in sorted(hist['buckets'].items())},
+            'total_ns': hist['total_ns'],
+        }
+    return {'latency': latencies, 'counters': dict(_counters), 'games': list(_games)}
+
+
+def _bucket_percentile(hist, pct):
+    """Upper bound, in microseconds, of the bucket holding the percentile."""
+    target = hist['count'] * pct / 100
+    seen = 0
+    for bucket in sorted(hist['buckets']):
+        seen += hist['buckets'][bucket]
+        if seen >= target:
+            return (1 << bucket) / 1000
+    return hist['max_ns'] / 1000
+
+
+def merge(other):
+    """Folds a snapshot from another process into this one's data."""
+    for label, hist in other['latency'].items():
+        mine = _latencies.setdefault(label, {'count': 0, 'total_ns': 0, 'max_ns': 0, 'buckets': {}})
+        mine['count'] += hist['count']
+        mine['total_ns'] += hist['total_ns']
+        mine['max_ns'] = max(mine['max_ns'], int(hist['max_us'] * 1000))
+        for bucket, n in hist['buckets'].items():
+            mine['buckets'][int(bucket)] = mine['buckets'].get(int(bucket), 0) + n
+    for name, n in other['counters'].items():
+        _counters[name] = _counters.get(name, 0) + n
+    _games.extend(other['games'])
+
+
+def export_json(path=None):
+    """Returns the snapshot as JSON text, also writing it to `path` if given."""
+    text = json.dumps(snapshot(), indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + "\n")
+    return text
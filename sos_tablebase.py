@@ -0,0 +1,199 @@
+"""Exact solver and memory-mapped tablebase for small SOS boards.
+
+Values are from the side to move's point of view: the best achievable
+future point difference in General mode, or +1/0/-1 in Simple mode. Past
+points do not change the best move, so one table serves every score.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from functools import lru_cache
+
+from sos_logic import SYMMETRY_COUNT, bitboard_lines, inverse_transform_cell, transform_cell
+
+MAGIC = b"SOSB"
+HEADER = struct.Struct("<4sBBI")   # magic, board size, mode (0 Simple, 1 General), records
+RECORD = struct.Struct("<QbB")     # canonical key, value, move (cell * 2 + is_O)
+# The key packs both n*n-bit masks into 64 bits, so the largest board is 5x5
+MAX_BOARD_SIZE = 5
+
+
+def check_board_size(board_size):
+    """Raises ValueError unless a table of `board_size` fits the record format."""
+    if not 1 <= board_size <= MAX_BOARD_SIZE:
+        raise ValueError(f"tablebases hold boards from 1x1 to {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE},"
+                         f" not {board_size}x{board_size}")
+
+
+@lru_cache(maxsize=None)
+def _symmetry_tables(board_size):
+    """Per symmetry, byte-chunk lookup tables that permute a cell bitmask."""
+    cells = board_size * board_size
+    chunks = (cells + 7) // 8
+    tables = []
+    for t in range(SYMMETRY_COUNT):
+        dest = [1 << (tr * board_size + tc)
+                for tr, tc in (transform_cell(i // board_size, i % board_size, board_size, t)
+                               for i in range(cells))]
+        per_chunk = []
+        for k in range(chunks):
+            lut = [0] * 256
+            for byte in range(256):
+                for bit in range(8):
+                    i = k * 8 + bit
+                    if byte >> bit & 1 and i < cells:
+                        lut[byte] |= dest[i]
+            per_chunk.append(lut)
+        tables.append(per_chunk)
+    return tables
+
+
+def _canonical(s_bits, o_bits, board_size):
+    """Returns (key, transform) for the smallest symmetric image of a position."""
+    cells = board_size * board_size
+    best_key, best_t = None, 0
+    for t, per_chunk in enumerate(_symmetry_tables(board_size)):
+        s = o = 0
+        for k, lut in enumerate(per_chunk):
+            s |= lut[s_bits >> (8 * k) & 0xFF]
+            o |= lut[o_bits >> (8 * k) & 0xFF]
+        key = s << cells | o
+        if best_key is None or key < best_key:
+            best_key, best_t = key, t
+    return best_key, best_t
+
+
+def board_key(board):
+    """Returns (key, transform): the canonical S/O masks packed into one int, and its symmetry."""
+    n = len(board)
+    s_bits = o_bits = 0
+    for r in range(n):
+        for c in range(n):
+            if board[r][c] == 'S':
+                s_bits |= 1 << (r * n + c)
+            elif board[r][c] == 'O':
+                o_bits |= 1 << (r * n + c)
+    return _canonical(s_bits, o_bits, n)
+
+
+def solve(board_size, game_mode, progress=None):
+    """Solves every non-terminal position reachable from the empty board.
+
+    Returns {key: (value, move)} with `move` as (row, col, letter) in the
+    canonical frame.
+    """
+    n = board_size
+    cells = n * n
+    full = (1 << cells) - 1
+    lines = bitboard_lines(n)
+    simple = game_mode == "Simple"
+    table = {}
+
+    def search(s_bits, o_bits):
+        key, t = _canonical(s_bits, o_bits, n)
+        hit = table.get(key)
+        if hit is not None:
+            return hit[0]
+        occupied = s_bits | o_bits
+        best_value, best_move = None, None
+        for cell in range(cells):
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            for letter in ('S', 'O'):
+                s, o = (s_bits | bit, o_bits) if letter == 'S' else (s_bits, o_bits | bit)
+                gain = sum(1 for s_mask, o_mask, _ in lines[cell][letter]
+                           if s & s_mask == s_mask and o & o_mask)
+                if simple and gain:
+                    value = 1
+                elif occupied | bit == full:
+                    value = gain
+                else:
+                    value = gain - search(s, o)
+                if best_value is None or value > best_value:
+                    best_value, best_move = value, (cell, letter)
+        cell, letter = best_move
+        table[key] = (best_value, transform_cell(cell // n, cell % n, n, t) + (letter,))
+        if progress and len(table) % 100000 == 0:
+            progress(len(table))
+        return best_value
+
+    if cells:
+        search(0, 0)
+    return table
+
+
+def write_table(path, board_size, game_mode, table):
+    """Writes a solved table as fixed-size records sorted by key."""
+    check_board_size(board_size)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, board_size, game_mode == "General", len(table)))
+        for key in sorted(table):
+            value, (r, c, letter) = table[key]
+            f.write(RECORD.pack(key, value, (r * board_size + c) * 2 + (letter == 'O')))
+
+
+class Tablebase:
+    """Read-only, memory-mapped view of a solved table with binary-search lookup."""
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.board_size, general, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an SOS tablebase")
+        self.game_mode = "General" if general else "Simple"
+
+    def lookup(self, board):
+        """Returns (value, (row, col, letter)) for `board`, or None if absent."""
+        key, t = board_key(board)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, value, move = RECORD.unpack_from(self._map, HEADER.size + mid * RECORD.size)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                cell, letter = divmod(move, 2)
+                r, c = inverse_transform_cell(*divmod(cell, self.board_size), self.board_size, t)
+                return value, (r, c, 'O' if letter else 'S')
+        return None
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def table_path(directory, board_size, game_mode):
+    """Conventional file name for a (size, mode) table."""
+    return os.path.join(directory, f"sos_{board_size}x{board_size}_{game_mode.lower()}.tb")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve small SOS boards into a tablebase.")
+    parser.add_argument('size', type=int)
+    parser.add_argument('mode', choices=('Simple', 'General'))
+    parser.add_argument('-d', '--directory', default='tablebases')
+    args = parser.parse_args(argv)
+    try:
+        check_board_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    os.makedirs(args.directory, exist_ok=True)
+    start = time.perf_counter()
+    table = solve(args.size, args.mode,
+                  progress=lambda n: print(f"  {n} positions solved", file=sys.stderr))
+    path = table_path(args.directory, args.size, args.mode)
+    write_table(path, args.size, args.mode, table)
+    root = table[board_key([[""] * args.size for _ in range(args.size)])[0]]
+    print(f"{path}: {len(table)} positions in {time.perf_counter() - start:.1f} s, "
+          f"empty-board value {root[0]}")
+
+
+if __name__ == '__main__':
+    main()
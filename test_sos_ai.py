@@ -0,0 +1,334 @@
+import asyncio
+import contextlib
+import io
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sos_ai import (AlphaBetaStrategy, CancelToken, MCTSStrategy, OllamaStrategy, SmartStrategy,
+                    choose_move_cancellable)
+
+
+class _StubOllama(BaseHTTPRequestHandler):
+    """Answers every chat completion with the server's configured reply."""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.server.bodies.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.server.requests += 1
+        with self.server.lock:
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+        # A list of replies is served in order, repeating the last one
+        reply = self.server.reply
+        if isinstance(reply, list):
+            reply = reply.pop(0) if len(reply) > 1 else reply[0]
+        body = json.dumps({"choices": [{"message": {"content": reply}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(reply="0,2,S", delay=0.0):
+    """Starts a local fake Ollama endpoint; returns (server, endpoint URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllama)
+    server.requests = server.connections = 0
+    server.bodies = []
+    server.active = server.max_active = 0
+    server.lock = threading.Lock()
+    server.reply = reply
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+class TestAlphaBetaStrategy(unittest.TestCase):
+    def test_takes_immediate_sos(self):
+        """Completes an open S-O in both modes."""
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        for mode in ("Simple", "General"):
+            strat = AlphaBetaStrategy(time_limit=0.5)
+            self.assertEqual(strat.choose_move(board, 3, {}, "Blue", mode), (0, 2, "S"))
+
+    def test_avoids_giving_away_sos(self):
+        """In Simple mode it does not set up an SOS for the opponent."""
+        board = [["S", "", ""], ["", "", ""], ["", "", ""]]
+        strat = AlphaBetaStrategy(time_limit=0.5, max_depth=2)
+        r, c, letter = strat.choose_move(board, 3, {}, "Blue", "Simple")
+        self.assertNotEqual((r, c, letter), (0, 1, "O"))
+        self.assertNotEqual((r, c, letter), (0, 2, "S"))
+
+    def test_respects_time_limit(self):
+        """Returns a legal move even when the budget is tiny."""
+        board = [[""] * 8 for _ in range(8)]
+        strat = AlphaBetaStrategy(time_limit=0.01)
+        r, c, letter = strat.choose_move(board, 8, {}, "Red", "General")
+        self.assertEqual(board[r][c], "")
+        self.assertIn(letter, ("S", "O"))
+
+
+class TestMCTSStrategy(unittest.TestCase):
+    def test_takes_immediate_sos(self):
+        """Finds the winning move in Simple mode."""
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        strat = MCTSStrategy(playouts=1000, workers=1, seed=3)
+        self.assertEqual(strat.choose_move(board, 3, {}, "Blue", "Simple"), (0, 2, "S"))
+        self.assertEqual(strat.last_playouts, 1000)
+        self.assertGreater(strat.last_playouts_per_second, 0)
+
+    def test_parallel_workers_share_budget(self):
+        """Root-parallel search splits playouts across the pool."""
+        board = [[""] * 4 for _ in range(4)]
+        strat = MCTSStrategy(playouts=400, workers=2, seed=3)
+        try:
+            r, c, letter = strat.choose_move(board, 4, {}, "Red", "General")
+        finally:
+            strat.close()
+        self.assertEqual(board[r][c], "")
+        self.assertEqual(strat.last_playouts, 400)
+
+    def test_requires_budget(self):
+        """Either a playout count or a time limit is required."""
+        with self.assertRaises(ValueError):
+            MCTSStrategy(playouts=None, time_limit=None)
+
+
+class TestOllamaStrategy(unittest.TestCase):
+    def setUp(self):
+        self.server, endpoint = start_stub_server()
+        self.strat = OllamaStrategy(endpoint=endpoint, timeout=5, cache_size=2)
+
+    def tearDown(self):
+        self.strat.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_repeated_position_served_from_cache(self):
+        """The same board and player only reach the server once."""
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        self.assertEqual(self.strat.choose_move(board, 3, {}, "Blue"), (0, 2, "S"))
+        self.assertEqual(self.strat.choose_move(board, 3, {}, "Blue"), (0, 2, "S"))
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.strat.cache.hits, 1)
+
+    def test_symmetric_position_hits_cache(self):
+        """A mirrored board reuses the cached move, mapped into its frame."""
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        mirrored = [["", "O", "S"], ["", "", ""], ["", "", ""]]
+        self.strat.choose_move(board, 3, {}, "Blue")
+        self.assertEqual(self.strat.choose_move(mirrored, 3, {}, "Blue"), (0, 0, "S"))
+        self.assertEqual(self.server.requests, 1)
+
+    def test_connection_reused(self):
+        """Distinct positions share one keep-alive connection."""
+        for r, c in ((0, 0), (0, 1), (1, 1)):
+            board = [[""] * 3 for _ in range(3)]
+            board[r][c] = "O"
+            self.strat.choose_move(board, 3, {}, "Red")
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_cache_evicts_least_recent(self):
+        """The LRU cache stays within its size bound."""
+        boards = []
+        for r, c in ((0, 0), (0, 1), (1, 1)):
+            board = [[""] * 3 for _ in range(3)]
+            board[r][c] = "S"
+            boards.append(board)
+            self.strat.choose_move(board, 3, {}, "Blue")
+        self.assertEqual(len(self.strat.cache), 2)
+        self.strat.choose_move(boards[0], 3, {}, "Blue")
+        self.assertEqual(self.server.requests, 4)
+
+
+class TestOllamaValidation(unittest.TestCase):
+    def setUp(self):
+        self.server, self.endpoint = start_stub_server()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_illegal_reply_is_repaired(self):
+        """An occupied cell triggers a repair prompt listing the legal cells."""
+        self.server.reply = ["0,0,S", "Sure!\n1,1,o"]
+        strat = OllamaStrategy(endpoint=self.endpoint, timeout=5)
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        self.assertEqual(strat.choose_move(board, 3, {}, "Blue"), (1, 1, "O"))
+        strat.close()
+        self.assertEqual(self.server.requests, 2)
+        repair = self.server.bodies[1]["messages"][-1]["content"]
+        self.assertIn("already taken", repair)
+        self.assertIn("0,2; 1,0; 1,1", repair)
+        self.assertEqual(strat.outcomes["repaired"], 1)
+        self.assertEqual(strat.invalid_replies, 1)
+
+    def test_persistent_garbage_uses_local_search(self):
+        """After the retry budget, the local fallback plays, not a random move."""
+        self.server.reply = "9,9,X"
+        strat = OllamaStrategy(endpoint=self.endpoint, timeout=5, max_retries=1)
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        self.assertEqual(strat.choose_move(board, 3, {}, "Blue"), (0, 2, "S"))
+        strat.close()
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(strat.outcomes, {"cached": 0, "valid": 0, "repaired": 0, "fallback": 1})
+        self.assertEqual(len(strat.cache), 0)
+
+    def test_diagnostics_stay_off_stdout(self):
+        """Rejected replies and server errors are logged, not printed."""
+        self.server.reply = "9,9,X"
+        strat = OllamaStrategy(endpoint=self.endpoint, timeout=5, max_retries=0)
+        down = OllamaStrategy(endpoint="http://127.0.0.1:1/v1/chat/completions", timeout=5)
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), self.assertLogs("sos_ai", "INFO") as logs:
+            strat.choose_move(board, 3, {}, "Blue")
+            down.choose_move(board, 3, {}, "Blue")
+        strat.close()
+        down.close()
+        self.assertEqual(out.getvalue(), "")
+        self.assertTrue(any("rejected" in line for line in logs.output))
+        self.assertTrue(any("Error talking" in line for line in logs.output))
+
+    def test_cancel_cuts_off_request_and_skips_fallback(self):
+        """Cancelling ends a slow dialogue promptly, without repair prompts or a search."""
+        self.server.delay = 2.0
+        self.server.reply = "9,9,X"
+        strat = OllamaStrategy(endpoint=self.endpoint, timeout=5, max_retries=2)
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        moves = []
+        cancel = CancelToken()
+        worker = threading.Thread(target=lambda: moves.append(
+            strat.choose_move(board, 3, {}, "Blue", cancel=cancel)))
+        start = time.perf_counter()
+        worker.start()
+        time.sleep(0.2)
+        cancel.cancel()
+        worker.join(5)
+        elapsed = time.perf_counter() - start
+        strat.close()
+        self.assertLess(elapsed, 1.0)
+        r, c, letter = moves[0]
+        self.assertEqual(board[r][c], "")
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(strat.outcomes["fallback"], 0)
+
+    def test_cancel_before_the_call_starts(self):
+        """A token cancelled before choose_move runs still stops it at once."""
+        self.server.delay = 2.0
+        cancel = CancelToken()
+        cancel.cancel()
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        start = time.perf_counter()
+        llm = OllamaStrategy(endpoint=self.endpoint, timeout=5)
+        smart = SmartStrategy()
+        smart.llm = llm
+        move = choose_move_cancellable(smart, cancel, [[""] * 3 for _ in range(3)], 3, {}, "Blue")
+        search = AlphaBetaStrategy(time_limit=5)
+        search_move = search.choose_move([[""] * 6 for _ in range(6)], 6, {}, "Red", cancel=cancel)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(move), 3)
+        self.assertEqual(len(search_move), 3)
+        self.assertEqual(self.server.requests, 0)
+        self.assertEqual(llm.outcomes["fallback"], 0)
+        # A fresh token is unaffected by the earlier cancel
+        self.server.delay = 0.0
+        self.assertEqual(llm.choose_move(board, 3, {}, "Blue", cancel=CancelToken()), (0, 2, "S"))
+        llm.close()
+
+
+class TestOllamaBatch(unittest.TestCase):
+    def setUp(self):
+        self.server, self.endpoint = start_stub_server(reply="4,4,O", delay=0.1)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _boards(self, count):
+        boards = []
+        for k in range(count):
+            board = [[""] * 5 for _ in range(5)]
+            board[0][0] = "S"
+            board[1 + k // 5][k % 5] = "O"
+            boards.append(board)
+        return boards
+
+    def _gather(self, strat, boards):
+        async def run():
+            return await asyncio.gather(*(strat.choose_move_async(b, 5, {}, "Blue")
+                                          for b in boards))
+        try:
+            return asyncio.run(run())
+        finally:
+            strat.close()
+
+    def test_requests_run_concurrently_within_limit(self):
+        """Pending moves from many games overlap, but never beyond `concurrency`."""
+        strat = OllamaStrategy(endpoint=self.endpoint, timeout=5, concurrency=4)
+        start = time.perf_counter()
+        moves = self._gather(strat, self._boards(8))
+        elapsed = time.perf_counter() - start
+        self.assertEqual(moves, [(4, 4, "O")] * 8)
+        self.assertEqual(self.server.requests, 8)
+        self.assertEqual(self.server.max_active, 4)
+        self.assertLess(elapsed, 8 * 0.1)
+
+    def test_timeout_uses_fallback_off_the_loop(self):
+        """Timed-out requests fall back off the loop, at most `fallback_workers` at a time."""
+        strat = OllamaStrategy(endpoint=self.endpoint, timeout=0.02, concurrency=10,
+                               fallback_workers=2)
+        boards = []
+        for k in range(5):
+            board = [[""] * 5 for _ in range(5)]
+            board[k][0], board[k][1] = "S", "O"
+            boards.append(board)
+        active, peak, lock = [0], [0], threading.Lock()
+        fallback = strat._fallback
+
+        def counted(*args):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                return fallback(*args)
+            finally:
+                with lock:
+                    active[0] -= 1
+        strat._fallback = counted
+
+        async def run():
+            ticks = 0
+            moves = asyncio.gather(*(strat.choose_move_async(b, 5, {}, "Blue") for b in boards))
+            while not moves.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return await moves, ticks
+        try:
+            moves, ticks = asyncio.run(run())
+        finally:
+            strat.close()
+        # Even time-sliced, each search still finds the only scoring move
+        self.assertEqual(moves, [(k, 2, "S") for k in range(5)])
+        self.assertEqual(strat.outcomes["fallback"], 5)
+        self.assertEqual(len(strat.cache), 0)
+        self.assertEqual(peak[0], 2)
+        # The loop kept running while the searches did
+        self.assertGreater(ticks, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sos_logic import BaseGame
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBatchGame(unittest.TestCase):
+    def test_matches_base_game(self):
+        """Batched play matches BaseGame on the same move sequences."""
+        from sos_batch import BatchGame, LETTER_CODES
+        for size in (3, 5, 8):
+            for mode in ("Simple", "General"):
+                batch = 64
+                rng = random.Random(size)
+                sequences = []
+                for _ in range(batch):
+                    cells = [(r, c) for r in range(size) for c in range(size)]
+                    rng.shuffle(cells)
+                    sequences.append([(r, c, rng.choice('SO')) for r, c in cells])
+
+                games = [BaseGame(size, mode) for _ in range(batch)]
+                for game, moves in zip(games, sequences):
+                    for r, c, letter in moves:
+                        game.make_move(r, c, letter)
+                        if game.check_game_over():
+                            break
+                        game.switch_player()
+
+                sim = BatchGame(batch, size, mode)
+                for ply in range(size * size):
+                    moves = [seq[ply] for seq in sequences]
+                    sim.step([m[0] for m in moves], [m[1] for m in moves],
+                             [LETTER_CODES[m[2]] for m in moves])
+
+                self.assertTrue(sim.game_over.all())
+                self.assertEqual(sim.blue_points.tolist(), [g.blue_points for g in games])
+                self.assertEqual(sim.red_points.tolist(), [g.red_points for g in games])
+                self.assertEqual(sim.total_moves.tolist(), [g.total_moves for g in games])
+                self.assertEqual(sim.winner_names(), [g.get_winner() for g in games])
+
+    def test_play_random_finishes_every_game(self):
+        """Random play runs all games to completion."""
+        from sos_batch import BatchGame
+        sim = BatchGame(200, 4, "General")
+        sim.play_random(0)
+        self.assertTrue((sim.total_moves == 16).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from sos_ai import BookStrategy, RandomStrategy
+from sos_book import OpeningBook
+
+
+class TestOpeningBook(unittest.TestCase):
+    def test_symmetric_openings_pool_together(self):
+        """Corner openings in any corner count toward one canonical entry."""
+        book = OpeningBook(max_plies=1)
+        win = [("Blue", "S", 0, 0), ("Red", "O", 1, 1), ("Blue", "S", 2, 2)]
+        mirrored = [("Blue", "S", 0, 2), ("Red", "O", 1, 1), ("Blue", "S", 2, 0)]
+        for _ in range(2):
+            book.add_game(3, "General", win)
+            book.add_game(3, "General", mirrored)
+        self.assertEqual(len(book.positions), 1)
+        move = book.lookup([[""] * 3 for _ in range(3)], "General")
+        self.assertIn(move, [(0, 0, "S"), (0, 2, "S"), (2, 0, "S"), (2, 2, "S")])
+
+    def test_prefers_winning_move_and_round_trips(self):
+        """The book picks the move with the best score and survives save/load."""
+        book = OpeningBook(max_plies=2)
+        for _ in range(3):
+            book.add_game(3, "Simple", [("Blue", "O", 1, 1), ("Red", "S", 0, 0), ("Blue", "S", 2, 2)])
+            book.add_game(3, "Simple", [("Blue", "S", 0, 1), ("Red", "O", 1, 1), ("Red", "S", 2, 1)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "book.json")
+            book.save(path)
+            loaded = OpeningBook.load(path)
+        self.assertEqual(loaded.lookup([[""] * 3 for _ in range(3)], "Simple"), (1, 1, "O"))
+
+    def test_lookup_maps_moves_out_of_the_canonical_frame(self):
+        """A reply stored in a rotated frame comes back on the board as given."""
+        book = OpeningBook(max_plies=2)
+        for _ in range(3):
+            book.add_game(3, "General", [("Blue", "S", 0, 0), ("Red", "O", 2, 2),
+                                         ("Blue", "S", 1, 1)])
+        board = [["S", "", ""], ["", "", ""], ["", "", ""]]
+        self.assertEqual(book.lookup(board, "General"), (2, 2, "O"))
+        rotated = [["", "", "S"], ["", "", ""], ["", "", ""]]
+        self.assertEqual(book.lookup(rotated, "General"), (2, 0, "O"))
+
+    def test_strategy_falls_back_past_horizon(self):
+        """BookStrategy defers to its fallback beyond the book's plies."""
+        book = OpeningBook(max_plies=1)
+        strat = BookStrategy(book, RandomStrategy())
+        board = [["S", "", ""], ["", "", ""], ["", "", ""]]
+        r, c, _ = strat.choose_move(board, 3, {}, "Red", "General")
+        self.assertEqual(board[r][c], "")
+        self.assertEqual(strat.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
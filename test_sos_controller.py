@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+from sos_ai import RandomStrategy, SmartStrategy
+from sos_controller import GameController, IllegalMove
+from sos_logic import BaseGame
+
+
+class _FixedStrategy:
+    def __init__(self, move):
+        self.move = move
+
+    def choose_move(self, board, board_size, letter_choices, player_color, game_mode="General"):
+        return self.move
+
+
+class TestGameController(unittest.TestCase):
+    def test_play_scores_and_passes_turn(self):
+        """A scoring move reports its sequences and points, then the turn passes."""
+        game = GameController.new(3, "General")
+        game.play(0, 0, "S")
+        game.play(0, 1, "O")
+        result = game.play(0, 2, "S")
+        self.assertEqual((result.player, result.points, result.game_over), ("Blue", 1, False))
+        self.assertEqual(len(result.sequences), 1)
+        self.assertEqual(game.current_player, "Red")
+        self.assertEqual(game.moves[-1], ("Blue", "S", 0, 2))
+
+    def test_illegal_moves_leave_game_unchanged(self):
+        game = GameController.new(3, "Simple")
+        game.play(1, 1, "S")
+        for move in ((1, 1, "O"), (3, 0, "S"), (-1, 0, "S"), (0, 0, "X")):
+            with self.assertRaises(IllegalMove):
+                game.play(*move)
+        self.assertEqual(game.current_player, "Red")
+        self.assertEqual(game.logic.total_moves, 1)
+
+    def test_no_moves_after_game_over(self):
+        """A Simple game ends on the first SOS, without passing the turn."""
+        game = GameController.new(3, "Simple")
+        for move in ((0, 0, "S"), (0, 1, "O")):
+            game.play(*move)
+        self.assertTrue(game.play(0, 2, "S").game_over)
+        self.assertEqual(game.current_player, "Blue")
+        with self.assertRaises(IllegalMove):
+            game.play(2, 2, "S")
+
+    def test_computer_moves(self):
+        """Strategies play through the controller; illegal choices are replaced."""
+        game = GameController.new(3, "General", {'Blue': _FixedStrategy((0, 0, "S")),
+                                                 'Red': _FixedStrategy((0, 0, "O"))})
+        self.assertTrue(game.computer_to_move())
+        self.assertEqual(game.run_computer()[:4], ("Blue", "S", 0, 0))
+        result = game.run_computer()
+        self.assertEqual(result.player, "Red")
+        self.assertNotEqual((result.row, result.col), (0, 0))
+
+    def test_full_game(self):
+        game = GameController.new(4, "General", {'Blue': RandomStrategy(), 'Red': RandomStrategy()})
+        while game.computer_to_move():
+            game.run_computer()
+        self.assertEqual(len(game.moves), 16)
+        self.assertTrue(game.game_over)
+
+    def test_strategies_read_the_live_threat_map(self):
+        """The strategy board carries the game, so SmartStrategy skips a rebuild."""
+        for engine in ("list", "bitboard", "sparse"):
+            game = GameController.new(6, "General", engine=engine)
+            game.play(2, 1, "S")
+            game.play(2, 2, "O")
+            board, n, letters, player = game.computer_args()
+            self.assertIs(board.game, game.logic)
+            with mock.patch.object(BaseGame, "rebuild_threats",
+                                   side_effect=AssertionError("threat map rebuilt")):
+                move = SmartStrategy().choose_move(board, n, letters, player)
+            self.assertIn(move, [(2, 0, "S"), (2, 3, "S")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sos_ai import AlphaBetaStrategy
+from sos_logic import BaseGame, sos_line_index
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestEvaluator(unittest.TestCase):
+    def _random_game(self, rng, size):
+        game = BaseGame(size, "General")
+        for _ in range(rng.randrange(size * size)):
+            r, c = rng.choice(game.empty_cells())
+            game.board[r][c] = rng.choice("SO")
+            game.total_moves += 1
+        return game
+
+    def test_score_maps_match_board(self):
+        """A cell is marked as scoring exactly when the letter completes an SOS."""
+        from sos_eval import board_array, cell_maps
+        rng = random.Random(3)
+        for _ in range(50):
+            size = rng.randint(3, 7)
+            game = self._random_game(rng, size)
+            index = sos_line_index(size)
+            scores_s, scores_o = cell_maps(board_array(game.board)[None])[:2]
+            for r, c in game.empty_cells():
+                for letter, scores in (("S", scores_s), ("O", scores_o)):
+                    game.board[r][c] = letter
+                    gain = sum(1 for (r1, c1), (rm, cm), (r2, c2) in index[r][c][letter]
+                               if game.board[r1][c1] + game.board[rm][cm] + game.board[r2][c2] == "SOS")
+                    game.board[r][c] = ""
+                    self.assertEqual(bool(scores[0, r, c]), gain > 0)
+
+    def test_give_away_maps(self):
+        """S__ and _O_ lines flag the placements that hand over a point."""
+        from sos_eval import board_array, cell_maps
+        board = [["S", "", ""], ["", "", ""], ["", "", ""]]
+        _, _, gives_s, gives_o, setups = cell_maps(board_array(board)[None])
+        self.assertTrue(gives_o[0, 0, 1])
+        self.assertTrue(gives_s[0, 0, 2])
+        self.assertTrue(gives_s[0, 2, 2])
+        self.assertFalse(gives_s[0, 1, 2])
+        self.assertEqual(setups[0], 3)
+
+    def test_children_scored_in_one_batch(self):
+        """evaluate_children agrees with evaluating each child on its own."""
+        from sos_eval import Evaluator, board_array
+        evaluator = Evaluator()
+        game = self._random_game(random.Random(5), 6)
+        moves = [(r, c, letter) for r, c in game.empty_cells() for letter in "SO"]
+        batched = evaluator.evaluate_children(game, moves)
+        for (r, c, letter), value in zip(moves, batched):
+            game.board[r][c] = letter
+            single = evaluator.evaluate(board_array(game.board)[None], "General")[0]
+            game.board[r][c] = ""
+            self.assertAlmostEqual(value, single)
+
+    def test_full_board_is_worth_nothing(self):
+        from sos_eval import Evaluator
+        boards = np.ones((2, 4, 4), dtype=np.int8)
+        for mode in ("Simple", "General"):
+            self.assertEqual(list(Evaluator().evaluate(boards, mode)), [0.0, 0.0])
+
+    def test_train_save_load(self):
+        """Weights fitted from self-play round-trip through JSON."""
+        from sos_eval import FEATURES, Evaluator, train
+        evaluator = train(50, [4], rng=1)
+        self.assertEqual(len(evaluator.weights["Simple"]), len(FEATURES))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eval.json")
+            evaluator.save(path)
+            loaded = Evaluator.load(path)
+        np.testing.assert_allclose(loaded.weights["General"], evaluator.weights["General"])
+
+    def test_alphabeta_with_evaluator(self):
+        """Frontier evaluation keeps the search taking immediate SOS."""
+        from sos_eval import Evaluator
+        board = [["S", "O", "", ""], ["", "", "", ""], ["", "", "", ""], ["", "", "", ""]]
+        for mode in ("Simple", "General"):
+            strat = AlphaBetaStrategy(time_limit=5, max_depth=2, evaluator=Evaluator())
+            self.assertEqual(strat.choose_move(board, 4, {}, "Blue", mode), (0, 2, "S"))
+
+    def test_alphabeta_evaluator_respects_time_limit(self):
+        """Batched frontier scoring still stops the search on time."""
+        from sos_eval import Evaluator
+        for size in (6, 8):
+            board = [[""] * size for _ in range(size)]
+            strat = AlphaBetaStrategy(time_limit=0.1, evaluator=Evaluator())
+            start = time.perf_counter()
+            strat.choose_move(board, size, {}, "Blue", "General")
+            self.assertLess(time.perf_counter() - start, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import tkinter as tk
-from sos_game_gui import SOSGameGUI
+from sos_gui import SOSGameGUI
 
 
 class TestSOSGameGUI(unittest.TestCase):
@@ -15,6 +15,11 @@ class TestSOSGameGUI(unittest.TestCase):
         """Destroy the Tkinter root after each test."""
         self.root.destroy()
 
+    def _finish_computer_move(self):
+        """Wait for the background AI move and apply it."""
+        self.game._ai_thread.join(timeout=10)
+        self.game._poll_ai_result(self.game._game_id)
+
     def test_choose_board_size(self):
         """Board size selector updates the grid dimensions correctly."""
         self.game.board_size_var.set(6)
@@ -88,6 +93,7 @@ class TestSOSGameGUI(unittest.TestCase):
             if self.game.logic.board[i][j] == ""
         )
         self.game._computer_move()
+        self._finish_computer_move()
         empties_after = sum(
             1 for i in range(self.game.n) for j in range(self.game.n)
             if self.game.logic.board[i][j] == ""
@@ -111,14 +117,49 @@ class TestSOSGameGUI(unittest.TestCase):
         self.game._start_new_game()
         # First computer move
         self.game._computer_move()
+        self._finish_computer_move()
         # Second computer move (after turn switch)
         self.game._computer_move()
+        self._finish_computer_move()
         moves_count = sum(
             1 for i in range(self.game.n) for j in range(self.game.n)
             if self.game.logic.board[i][j] != ""
         )
         self.assertGreaterEqual(moves_count, 2)
 
+    def test_canvas_renderer(self):
+        """The canvas renderer draws moves without creating button widgets."""
+        self.game.renderer_var.set("Canvas")
+        self.game.board_size_var.set(8)
+        self.game._start_new_game()
+        self.assertEqual(self.game.buttons, [])
+        self.game.make_move(2, 3)
+        item = self.game.board_view._items[(2, 3)]
+        self.assertEqual(self.game.board_view.canvas.itemcget(item, "text"), "S")
+
+    def test_replay_uses_recorded_size(self):
+        """Replay rebuilds the board at the recorded size and can step back."""
+        moves = [("Blue", "S", 0, 0), ("Red", "O", 3, 3), ("Blue", "S", 1, 2)]
+        self.game._start_replay(4, "General", moves)
+        self.assertEqual(len(self.game.buttons), 4)
+        self.game._replay_seek(3)
+        self.assertEqual(self.game.buttons[3][3]["text"], "O")
+        self.game._replay_step(-2)
+        self.assertEqual(self.game.buttons[3][3]["text"], "")
+        self.assertEqual(self.game.buttons[0][0]["text"], "S")
+
+    def test_stale_computer_move_ignored(self):
+        """A move computed for a previous game is not applied to a new one."""
+        self.game.blue_type.set("Computer")
+        self.game._start_new_game()
+        self.game._computer_move()
+        thread = self.game._ai_thread
+        self.game.blue_type.set("Human")
+        self.game._start_new_game()
+        thread.join(timeout=10)
+        self.game._poll_ai_result(self.game._game_id)
+        self.assertTrue(all(cell == "" for row in self.game.logic.board for cell in row))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,170 @@
+import random
+import unittest
+from sos_logic import (BaseGame, BitboardGame, SparseGame, canonicalize, create_game,
+                       inverse_transform_cell, sos_line_index, transform_cell)
+
+
+def play_random(game, seed):
+    """Plays a seeded random game, returning the sequences found per move."""
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(game.board_size) for c in range(game.board_size)]
+    rng.shuffle(cells)
+    trace = []
+    for r, c in cells:
+        letter = rng.choice(['S', 'O'])
+        game.make_move(r, c, letter)
+        trace.append(game.check_for_sos(r, c))
+        if game.check_game_over():
+            break
+        game.switch_player()
+    return trace
+
+
+class TestBitboardGame(unittest.TestCase):
+    def test_matches_list_engine(self):
+        """Bitboard engine reports the same sequences, scores and winner."""
+        for size in range(3, 9):
+            for mode in ("Simple", "General"):
+                for seed in range(20):
+                    ref, fast = BaseGame(size, mode), BitboardGame(size, mode)
+                    self.assertEqual(play_random(ref, seed), play_random(fast, seed))
+                    self.assertEqual(ref.board, fast.board)
+                    self.assertEqual((ref.blue_points, ref.red_points, ref.total_moves),
+                                     (fast.blue_points, fast.red_points, fast.total_moves))
+                    self.assertEqual(ref.get_winner(), fast.get_winner())
+
+    def test_off_board_moves_are_rejected(self):
+        """Cells past an edge raise instead of wrapping onto another cell."""
+        game = BitboardGame(5, "General")
+        for row, col in ((0, 5), (5, 0), (-1, 2), (2, -1)):
+            with self.assertRaises(IndexError):
+                game.make_move(row, col, "S")
+        self.assertEqual(game.total_moves, 0)
+        self.assertEqual(game.board, BaseGame(5, "General").board)
+
+    def test_sparse_matches_list_engine(self):
+        """The sparse engine reports the same sequences, scores and winner."""
+        for size in (3, 6, 9):
+            for mode in ("Simple", "General"):
+                for seed in range(10):
+                    ref, sparse = BaseGame(size, mode), SparseGame(size, mode)
+                    self.assertEqual(play_random(ref, seed), play_random(sparse, seed))
+                    self.assertEqual(ref.board, [list(row) for row in sparse.board])
+                    self.assertEqual(sorted(ref.empty_cells()), sorted(sparse.empty_cells()))
+                    self.assertEqual(ref.get_winner(), sparse.get_winner())
+
+    def test_occupied_cell_rejected(self):
+        """Placing on an occupied cell fails without changing state."""
+        game = BitboardGame(3, "General")
+        self.assertTrue(game.make_move(1, 1, 'O'))
+        self.assertFalse(game.make_move(1, 1, 'S'))
+        self.assertEqual(game.total_moves, 1)
+
+    def test_board_assignment_loads_position(self):
+        """Assigning a list-of-lists board loads it into the masks."""
+        game = BitboardGame(3, "General")
+        game.board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        self.assertTrue(game.make_move(0, 2, 'S'))
+        self.assertEqual(game.blue_points, 1)
+
+    def test_create_game(self):
+        """Engine is selectable by name at construction."""
+        self.assertIsInstance(create_game(4, "Simple", engine="bitboard"), BitboardGame)
+        self.assertIs(type(create_game(4, "Simple")), BaseGame)
+        with self.assertRaises(ValueError):
+            create_game(4, "Simple", engine="nope")
+
+
+class TestUnmakeMove(unittest.TestCase):
+    def test_unmake_restores_state(self):
+        """Unmaking every move in reverse returns each engine to its start."""
+        for engine in (BaseGame, BitboardGame, SparseGame):
+            game = engine(5, "General")
+            snapshots = []
+            rng = random.Random(7)
+            cells = [(r, c) for r in range(5) for c in range(5)]
+            rng.shuffle(cells)
+            for r, c in cells:
+                snapshots.append(([row[:] for row in game.board], game.total_moves,
+                                  game.current_player, game.blue_points, game.red_points))
+                game.make_move(r, c, rng.choice(['S', 'O']))
+                game.switch_player()
+            for (r, c), snap in zip(reversed(cells), reversed(snapshots)):
+                self.assertEqual(game.unmake_move(), (r, c))
+                self.assertEqual(([row[:] for row in game.board], game.total_moves,
+                                  game.current_player, game.blue_points, game.red_points), snap)
+                self.assertEqual(len(game.empty_cells()), 25 - game.total_moves)
+            self.assertEqual(game.move_history, [])
+
+    def test_failed_move_not_recorded(self):
+        """Rejected moves do not push onto the history stack."""
+        game = BaseGame(3, "Simple")
+        game.make_move(0, 0, 'S')
+        game.make_move(0, 0, 'O')
+        self.assertEqual(len(game.move_history), 1)
+
+
+class TestThreatMap(unittest.TestCase):
+    def test_incremental_matches_rebuild(self):
+        """The incrementally maintained map equals one built from scratch."""
+        for engine in (BaseGame, BitboardGame, SparseGame):
+            game = engine(6, "General", track_threats=True)
+            rng = random.Random(11)
+            cells = [(r, c) for r in range(6) for c in range(6)]
+            rng.shuffle(cells)
+            for i, (r, c) in enumerate(cells):
+                game.make_move(r, c, rng.choice(['S', 'O']))
+                if i % 5 == 4:
+                    game.unmake_move()
+                fresh = BaseGame.from_board(game.board, "General", track_threats=True)
+                self.assertEqual(game.threats, fresh.threats)
+
+    def test_threat_values(self):
+        """Threats list each scoring placement with its point value."""
+        board = [["S", "", "S"], ["", "", ""], ["S", "", "S"]]
+        game = BaseGame.from_board(board, "General", track_threats=True)
+        self.assertEqual(game.threats, {(0, 1, 'O'): 1, (1, 0, 'O'): 1, (1, 1, 'O'): 2,
+                                        (1, 2, 'O'): 1, (2, 1, 'O'): 1})
+        self.assertEqual(game.best_threat(), (1, 1, 'O'))
+
+
+class TestSOSLineIndex(unittest.TestCase):
+    def test_index_is_shared_per_size(self):
+        """The line index is built once per board size."""
+        self.assertIs(sos_line_index(5), sos_line_index(5))
+
+    def test_corner_and_center_triples(self):
+        """Triples touching a cell are in bounds and unique."""
+        index = sos_line_index(3)
+        self.assertEqual(len(index[0][0]['S']), 3)
+        self.assertEqual(len(index[0][0]['O']), 0)
+        self.assertEqual(len(index[1][1]['O']), 4)
+        self.assertEqual(len(index[1][1]['S']), 0)
+
+
+class TestCanonicalization(unittest.TestCase):
+    def test_symmetric_boards_share_key(self):
+        """All 8 images of a board canonicalize to the same key."""
+        game = BaseGame(4, "General")
+        play_random(game, 3)
+        board = game.board
+        key, _ = game.canonical_form()
+        for t in range(8):
+            image = [[""] * 4 for _ in range(4)]
+            for r in range(4):
+                for c in range(4):
+                    tr, tc = transform_cell(r, c, 4, t)
+                    image[tr][tc] = board[r][c]
+            self.assertEqual(canonicalize(image)[0], key)
+
+    def test_transform_maps_moves_back(self):
+        """A cell mapped into the canonical frame maps back to itself."""
+        board = [["", "", "S"], ["", "O", ""], ["", "", ""]]
+        key, t = canonicalize(board)
+        r, c = transform_cell(0, 2, 3, t)
+        self.assertEqual(key[r * 3 + c], "S")
+        self.assertEqual(inverse_transform_cell(r, c, 3, t), (0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
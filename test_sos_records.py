@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from sos_records import (RecordWriter, build_index, game_count, iter_games,
+                         read_game, index_path)
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "games.sosr")
+        self.games = [
+            (3, "Simple", [("Blue", "S", 0, 0), ("Red", "O", 1, 1), ("Blue", "S", 2, 2)]),
+            (8, "General", [("Red", "O", 7, 7), ("Blue", "S", 0, 7)]),
+            (200, "General", [("Blue", "O", 199, 199), ("Red", "S", 150, 3)]),
+        ]
+        with RecordWriter(self.path) as writer:
+            for game in self.games:
+                writer.write_game(*game)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stream_round_trip(self):
+        """Games stream back exactly as written."""
+        self.assertEqual([tuple(g) for g in iter_games(self.path)], self.games)
+
+    def test_random_access(self):
+        """Any game can be read directly through the index."""
+        self.assertEqual(game_count(self.path), 3)
+        self.assertEqual(tuple(read_game(self.path, 1)), self.games[1])
+        self.assertEqual(tuple(read_game(self.path, -1)), self.games[2])
+
+    def test_append_and_rebuild_index(self):
+        """Appending reopens the archive; a lost index can be rebuilt."""
+        with RecordWriter(self.path) as writer:
+            self.assertEqual(writer.write_game(4, "Simple", [("Blue", "S", 3, 3)]), 3)
+        os.remove(index_path(self.path))
+        self.assertEqual(build_index(self.path), 4)
+        self.assertEqual(read_game(self.path, 3).moves, [("Blue", "S", 3, 3)])
+
+    def test_compact(self):
+        """Small-board moves take two bytes each."""
+        size = os.path.getsize(self.path)
+        self.assertEqual(size, 4 + 3 * 8 + (3 + 2) * 2 + 2 * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import random
+import unittest
+from sos_logic import BaseGame
+from sos_replay import ReplayEngine
+
+
+def _random_game(size, mode, seed):
+    rng = random.Random(seed)
+    game = BaseGame(size, mode)
+    moves = []
+    while not game.check_game_over():
+        r, c = rng.choice(game.empty_cells())
+        letter = rng.choice("SO")
+        moves.append((game.current_player, letter, r, c))
+        game.make_move(r, c, letter)
+        game.switch_player()
+    return moves
+
+
+class TestReplayEngine(unittest.TestCase):
+    def test_positions_match_game(self):
+        """Every ply rebuilt from keyframes matches playing the moves out."""
+        moves = _random_game(6, "General", 1)
+        engine = ReplayEngine(6, "General", moves, keyframe_interval=5)
+        game = BaseGame(6, "General")
+        for ply in range(len(moves) + 1):
+            cells, blue, red = engine.position(ply)
+            self.assertEqual(cells, {(r, c): (l, p) for p, l, r, c in moves[:ply]})
+            self.assertEqual((blue, red), (game.blue_points, game.red_points))
+            if ply < len(moves):
+                player, letter, r, c = moves[ply]
+                game.current_player = player
+                game.make_move(r, c, letter)
+
+    def test_seek_updates_reproduce_positions(self):
+        """Applying each frame's changes to a board tracks arbitrary seeks."""
+        moves = _random_game(12, "General", 2)
+        engine = ReplayEngine(12, "General", moves)
+        rng = random.Random(3)
+        board = {}
+        for target in [rng.randrange(-5, len(moves) + 5) for _ in range(200)] + [0, 1, 0]:
+            frame = engine.seek(target)
+            if frame.reset:
+                board = {}
+            for cell, value in frame.changes.items():
+                if value is None:
+                    del board[cell]
+                else:
+                    board[cell] = value
+            cells, blue, red = engine.position(frame.ply)
+            self.assertEqual(board, cells)
+            self.assertEqual((frame.blue_points, frame.red_points), (blue, red))
+            self.assertEqual(frame.ply, max(0, min(target, len(moves))))
+
+    def test_steps_touch_one_cell(self):
+        moves = _random_game(5, "Simple", 4)
+        engine = ReplayEngine(5, "Simple", moves)
+        engine.seek(len(moves))
+        self.assertTrue(engine.at_end)
+        frame = engine.step(-1)
+        player, letter, r, c = moves[-1]
+        self.assertEqual(frame.changes, {(r, c): None})
+        self.assertEqual(engine.step(1).changes, {(r, c): (letter, player)})
+
+    def test_long_jump_back_rebuilds(self):
+        """Seeking far back redraws the few remaining cells instead of clearing the rest."""
+        moves = _random_game(10, "General", 5)
+        engine = ReplayEngine(10, "General", moves)
+        engine.seek(len(moves))
+        frame = engine.seek(3)
+        self.assertTrue(frame.reset)
+        self.assertEqual(len(frame.changes), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
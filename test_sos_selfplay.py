@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+from unittest import mock
+from sos_ai import RandomStrategy
+from sos_selfplay import (main, play_game, play_game_async, run_concurrent, run_match, summarize,
+                          percentile)
+
+
+class TestSelfPlay(unittest.TestCase):
+    def test_play_game_fills_or_scores(self):
+        """A headless game runs to completion and reports per-move latency."""
+        result = play_game(RandomStrategy(), RandomStrategy(), 4, "General")
+        self.assertEqual(result['moves'], 16)
+        self.assertEqual(len(result['latencies']), 16)
+        self.assertIn(result['winner'], ("Blue", "Red", "Draw"))
+
+    def test_run_match_summary(self):
+        """Match summaries report rates that add up to one."""
+        results, elapsed = run_match('random', 'random', 10, 3, "Simple", workers=1)
+        summary = summarize(results, elapsed)
+        self.assertEqual(summary['games'], 10)
+        self.assertAlmostEqual(summary['blue_win_rate'] + summary['red_win_rate']
+                               + summary['draw_rate'], 1.0)
+
+    def test_concurrent_games(self):
+        """Games played under asyncio complete like sequential ones."""
+        result = asyncio.run(play_game_async(RandomStrategy(), RandomStrategy(), 4, "General"))
+        self.assertEqual(result['moves'], 16)
+        results, _ = run_concurrent('random', 'random', 5, 3, "Simple")
+        self.assertEqual(len(results), 5)
+
+    def test_percentile(self):
+        """Nearest-rank percentiles pick existing samples."""
+        self.assertEqual(percentile([3, 1, 2, 4], 50), 2)
+        self.assertEqual(percentile([3, 1, 2, 4], 99), 4)
+
+    def test_zero_games_rejected(self):
+        """-n 0 is a usage error rather than a ZeroDivisionError in summarize."""
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit) as exit_:
+            main(["random", "random", "-n", "0"])
+        self.assertEqual(exit_.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import contextlib
+import io
+import unittest
+from unittest import mock
+from sos_server import Client, GameServer, load_test
+
+
+class _BrokenStrategy:
+    def choose_move(self, *args, **kwargs):
+        raise RuntimeError("search blew up")
+
+
+class TestGameServer(unittest.TestCase):
+    def _run(self, scenario, **options):
+        async def run():
+            server = await GameServer(port=0, **options).start()
+            try:
+                return await scenario(server)
+            finally:
+                await server.close()
+        return asyncio.run(run())
+
+    def test_human_move_gets_computer_reply(self):
+        """A human move is answered together with the computer's reply."""
+        async def scenario(server):
+            client = await Client.connect(port=server.port)
+            new = await client.request(op="new", size=3, mode="General", red="random", id=7)
+            move = await client.request(op="move", game=new["game"], row=1, col=1, letter="o")
+            state = await client.request(op="state", game=new["game"])
+            await client.close()
+            return new, move, state
+        new, move, state = self._run(scenario)
+        self.assertEqual((new["ok"], new["moves"], new["id"]), (True, [], 7))
+        self.assertEqual(move["moves"][0], ["Blue", "O", 1, 1, 0])
+        self.assertEqual(move["moves"][1][0], "Red")
+        self.assertEqual(move["turn"], "Blue")
+        self.assertEqual(sum(row.count(".") for row in state["board"]), 7)
+
+    def test_errors(self):
+        """Bad requests get error replies and the connection stays usable."""
+        async def scenario(server):
+            client = await Client.connect(port=server.port)
+            new = await client.request(op="new", size=3)
+            replies = [
+                await client.request(op="move", game=new["game"], row=5, col=0, letter="S"),
+                await client.request(op="move", game=99, row=0, col=0, letter="S"),
+                await client.request(op="new", size=3, red="nobody"),
+                await client.request(op="dance"),
+            ]
+            replies.append(await client.request(op="move", game=new["game"], row=0, col=0,
+                                                letter="S"))
+            await client.close()
+            return replies
+        replies = self._run(scenario)
+        self.assertEqual([r["ok"] for r in replies], [False, False, False, False, True])
+        self.assertIn("off the 3x3 board", replies[0]["error"])
+
+    def test_failing_strategy_is_logged_and_replaced(self):
+        """A strategy error is logged with its traceback, off stdout, and a random move plays."""
+        async def scenario(server):
+            client = await Client.connect(port=server.port)
+            new = await client.request(op="new", size=3, blue="broken")
+            await client.close()
+            return new
+        out = io.StringIO()
+        with mock.patch.dict("sos_server.STRATEGIES", broken=_BrokenStrategy), \
+                contextlib.redirect_stdout(out), self.assertLogs("sos_server", "ERROR") as logs:
+            new = self._run(scenario)
+        self.assertTrue(new["ok"])
+        self.assertEqual(new["moves"][0][0], "Blue")
+        self.assertEqual(out.getvalue(), "")
+        self.assertIn("Traceback", logs.output[0])
+        self.assertIn("search blew up", logs.output[0])
+
+    def test_session_limit(self):
+        async def scenario(server):
+            client = await Client.connect(port=server.port)
+            replies = [await client.request(op="new", size=3) for _ in range(3)]
+            await client.close()
+            return replies
+        replies = self._run(scenario, max_sessions=2)
+        self.assertEqual([r["ok"] for r in replies], [True, True, False])
+        self.assertEqual(replies[2]["error"], "server full")
+
+    def test_computer_vs_computer_and_disconnect(self):
+        """A game between strategies finishes on creation; sessions die with the connection."""
+        async def scenario(server):
+            client = await Client.connect(port=server.port)
+            reply = await client.request(op="new", size=4, blue="random", red="random")
+            open_games = len(server.sessions)
+            await client.close()
+            await asyncio.sleep(0.05)
+            return reply, open_games, len(server.sessions)
+        reply, open_games, after = self._run(scenario)
+        self.assertTrue(reply["over"])
+        self.assertEqual(len(reply["moves"]), 16)
+        self.assertEqual((open_games, after), (1, 0))
+
+    def test_load_test(self):
+        """The load tester plays many concurrent games to completion."""
+        async def scenario(server):
+            return await load_test("127.0.0.1", server.port, 40, 4, size=3)
+        summary = self._run(scenario)
+        self.assertEqual(summary["games"], 40)
+        self.assertEqual(summary["moves"], 40 * 9)
+        self.assertGreater(summary["moves_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
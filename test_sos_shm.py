@@ -0,0 +1,137 @@
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from sos_ai import MCTSStrategy
+from sos_logic import BaseGame
+from sos_shm import GameStateBlock, SearchPool, _run_task, block_size, decode
+
+
+def _describe(game, tag):
+    """Pool task: reports what the worker sees, after a made-and-unmade move."""
+    r, c = game.empty_cells()[0]
+    game.make_move(r, c, "S")
+    game.unmake_move()
+    return tag, game.board_size, game.current_player, game.total_moves, \
+        game.blue_points, game.red_points, game.board[0][:3]
+
+
+def _fail_after_move(game):
+    """Pool task: makes a move and raises without undoing it."""
+    r, c = game.empty_cells()[0]
+    game.make_move(r, c, "S")
+    raise RuntimeError("task failed")
+
+
+class TestGameStateBlock(unittest.TestCase):
+    def setUp(self):
+        self.block = GameStateBlock(5)
+
+    def tearDown(self):
+        self.block.close()
+
+    def test_round_trip(self):
+        """Board, mode, player, move count and scores survive the byte layout."""
+        game = BaseGame(4, "Simple")
+        for r, c, letter in ((0, 0, "S"), (1, 2, "O"), (3, 3, "S")):
+            game.make_move(r, c, letter)
+        game.current_player = "Red"
+        game.red_points = 2
+        self.block.publish_game(game)
+        copy = decode(self.block.shm.buf)
+        self.assertEqual(copy.board, game.board)
+        self.assertEqual((copy.game_mode, copy.current_player, copy.total_moves,
+                          copy.blue_points, copy.red_points), ("Simple", "Red", 3, 0, 2))
+        self.assertEqual(block_size(4), 28 + 16)
+
+    def test_generations_and_size_limit(self):
+        board = [[""] * 3 for _ in range(3)]
+        self.assertEqual(self.block.publish(board, "General", "Blue"), 1)
+        self.assertEqual(self.block.publish(board, "General", "Red"), 2)
+        with self.assertRaises(ValueError):
+            self.block.publish([[""] * 6 for _ in range(6)], "General", "Blue")
+
+
+class TestSearchPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SearchPool(workers=2, max_board_size=4)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_workers_read_shared_position(self):
+        """Tasks see the published position, including a block regrown for a bigger board."""
+        game = BaseGame(4, "General")
+        game.make_move(0, 1, "O")
+        game.switch_player()
+        results = self.pool.run(game, _describe, [("a",), ("b",), ("c",)])
+        self.assertEqual([r[0] for r in results], ["a", "b", "c"])
+        self.assertEqual(results[0][1:], (4, "Red", 1, 0, 0, ["", "O", ""]))
+
+        big = BaseGame(7, "Simple")
+        big.make_move(0, 2, "S")
+        results = self.pool.run(big, _describe, [("d",)] * 2)
+        self.assertEqual(results[0][1:], (7, "Blue", 1, 0, 0, ["", "", "S"]))
+
+    def test_strategies_share_a_pool(self):
+        board = [["S", "O", ""], ["", "", ""], ["", "", ""]]
+        strat = MCTSStrategy(playouts=200, seed=1, pool=self.pool)
+        self.assertEqual(strat.choose_move(board, 3, {}, "Blue"), (0, 2, "S"))
+        self.assertEqual(strat.last_playouts, 200)
+        strat.close()
+        # The pool belongs to the caller and keeps working
+        self.assertEqual(len(self.pool.run(BaseGame(3, "General"), _describe, [("e",)])), 1)
+
+    def test_failed_task_does_not_corrupt_later_tasks(self):
+        """A task that raises mid-move leaves no trace for the next task."""
+        game = BaseGame(3, "General")
+        pool = SearchPool(workers=1, max_board_size=3)
+        try:
+            with self.assertRaises(RuntimeError):
+                pool.run(game, _fail_after_move, [()])
+            # Same generation, same worker: the cached game must be clean
+            with pool._lock:
+                result = pool._pool.apply(_run_task, (pool._block.name, pool._block.generation,
+                                                      _describe, ("f",)))
+        finally:
+            pool.close()
+        self.assertEqual(result[3], 0)
+        self.assertEqual(result[6], ["", "", ""])
+
+    def test_concurrent_runs_take_turns(self):
+        """Threads sharing a pool each get results for their own position."""
+        games = []
+        for size in (3, 4, 5, 6):
+            game = BaseGame(size, "General")
+            game.make_move(0, 0, "O")
+            games.append(game)
+        results = {}
+
+        def search(game):
+            results[game.board_size] = [self.pool.run(game, _describe, [("x",)] * 4)
+                                        for _ in range(5)]
+
+        threads = [threading.Thread(target=search, args=(game,)) for game in games]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for size, runs in results.items():
+            self.assertEqual({r[1] for run in runs for r in run}, {size})
+        self.assertEqual(len(results), 4)
+
+    def test_unclosed_pool_is_released_at_exit(self):
+        """A strategy's pool that nobody closes leaves no shared block behind."""
+        script = ("from sos_ai import MCTSStrategy\n"
+                  "if __name__ == '__main__':\n"
+                  "    MCTSStrategy(playouts=100, workers=2).choose_move("
+                  "[[''] * 3 for _ in range(3)], 3, {}, 'Blue')\n")
+        proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=60)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertNotIn("leaked", proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import sos_stats
+from sos_ai import RandomStrategy
+from sos_logic import BaseGame
+
+
+class TestStats(unittest.TestCase):
+    def tearDown(self):
+        sos_stats.disable()
+        sos_stats.reset()
+
+    def test_disabled_leaves_methods_untouched(self):
+        """Disabling restores the original functions and ignores counters."""
+        original = BaseGame.__dict__["make_move"]
+        sos_stats.enable()
+        self.assertIsNot(BaseGame.__dict__["make_move"], original)
+        sos_stats.disable()
+        self.assertIs(BaseGame.__dict__["make_move"], original)
+        sos_stats.count("nodes", 5)
+        self.assertEqual(sos_stats.snapshot()["counters"], {})
+
+    def test_records_latency_counters_and_games(self):
+        """Enabled stats time registered calls and keep counters and summaries."""
+        sos_stats.enable()
+        game = BaseGame(3, "General")
+        game.make_move(0, 0, "S")
+        RandomStrategy().choose_move(game.board, 3, {}, "Red")
+        sos_stats.count("nodes", 5)
+        sos_stats.game_summary(winner="Draw")
+        snap = sos_stats.snapshot()
+        self.assertEqual(snap["latency"]["BaseGame.make_move"]["count"], 1)
+        self.assertEqual(snap["latency"]["RandomStrategy.choose_move"]["count"], 1)
+        self.assertEqual(snap["counters"], {"nodes": 5})
+        self.assertEqual(snap["games"], [{"winner": "Draw"}])
+
+    def test_merge_adds_up(self):
+        """Snapshots from other processes merge into the local totals."""
+        sos_stats.enable()
+        BaseGame(3, "General").make_move(1, 1, "O")
+        sos_stats.count("hits")
+        snap = sos_stats.snapshot()
+        sos_stats.merge(snap)
+        merged = sos_stats.snapshot()
+        self.assertEqual(merged["latency"]["BaseGame.make_move"]["count"], 2)
+        self.assertEqual(merged["counters"]["hits"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
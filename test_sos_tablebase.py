@@ -0,0 +1,90 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from sos_ai import TablebaseStrategy, RandomStrategy
+from sos_logic import BaseGame
+from sos_tablebase import MAX_BOARD_SIZE, Tablebase, main, solve, table_path, write_table
+
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        for mode in ("Simple", "General"):
+            write_table(table_path(cls.tmp.name, 3, mode), 3, mode, solve(3, mode))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_values_are_consistent(self):
+        """Each stored value equals the best one-ply backup over the table."""
+        for mode in ("Simple", "General"):
+            table = Tablebase(table_path(self.tmp.name, 3, mode))
+            rng = random.Random(5)
+            for _ in range(50):
+                game = BaseGame(3, mode)
+                for _ in range(rng.randrange(8)):
+                    empties = [(r, c) for r in range(3) for c in range(3) if game.board[r][c] == ""]
+                    game.make_move(*rng.choice(empties), rng.choice("SO"))
+                    game.switch_player()
+                if game.check_game_over():
+                    continue
+                value, (r, c, letter) = table.lookup(game.board)
+                self.assertEqual(game.board[r][c], "")
+                best = None
+                for rr in range(3):
+                    for cc in range(3):
+                        for ll in "SO":
+                            if game.board[rr][cc]:
+                                continue
+                            before = game.blue_points + game.red_points
+                            game.make_move(rr, cc, ll)
+                            gain = game.blue_points + game.red_points - before
+                            if game.check_game_over():
+                                v = (1 if gain else 0) if mode == "Simple" else gain
+                            else:
+                                v = gain - table.lookup(game.board)[0]
+                            game.unmake_move()
+                            best = v if best is None else max(best, v)
+                self.assertEqual(value, best)
+            table.close()
+
+    def test_strategy_never_loses_as_first_player(self):
+        """Perfect play from the empty 3x3 board never loses to random play."""
+        strat = TablebaseStrategy(self.tmp.name, fallback=RandomStrategy())
+        for seed in range(10):
+            random.seed(seed)
+            game = BaseGame(3, "General")
+            players = {"Blue": strat, "Red": RandomStrategy()}
+            while not game.check_game_over():
+                p = game.current_player
+                game.make_move(*players[p].choose_move(game.board, 3, {}, p, "General"))
+                if not game.check_game_over():
+                    game.switch_player()
+            self.assertGreaterEqual(game.blue_points, game.red_points)
+        self.assertEqual(strat.misses, 0)
+
+    def test_missing_table_uses_fallback(self):
+        """Sizes without a table are delegated to the fallback strategy."""
+        strat = TablebaseStrategy(os.path.join(self.tmp.name, "none"), fallback=RandomStrategy())
+        board = [[""] * 5 for _ in range(5)]
+        r, c, _ = strat.choose_move(board, 5, {}, "Blue", "General")
+        self.assertEqual(board[r][c], "")
+        self.assertEqual(strat.misses, 1)
+
+    def test_oversized_boards_are_rejected(self):
+        """Boards whose masks overflow the 64-bit key fail before solving."""
+        size = MAX_BOARD_SIZE + 1
+        with self.assertRaises(ValueError):
+            write_table(table_path(self.tmp.name, size, "General"), size, "General", {})
+        with mock.patch("sos_tablebase.solve") as solve_mock, \
+                mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            main([str(size), "General", "-d", self.tmp.name])
+        solve_mock.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()